@@ -0,0 +1,5 @@
+"""Benchmarks of the Capture The Flag (Ctf) simulation and learning hot paths.
+
+Run them all with `python -m benchmarks`, which prints or writes the
+results as JSON.
+"""
@@ -0,0 +1,65 @@
+"""Runs the benchmarks and reports them as JSON.
+
+    python -m benchmarks [--quick] [--output results.json] [name ...]
+
+Exits with status 1 if `import ctf` exceeds the budget of
+`benchmarks.startup`.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+import ctf
+from benchmarks import memory, micro, startup, throughput
+
+BENCHMARKS = {
+    'throughput': (throughput.run, {'sizes': ((10, 8), (20, 16)), 'units': ((1, 1), (2, 2)), 'steps': 500}),
+    'micro': (micro.run, {'number': 500, 'repeat': 3, 'warmup': 1000}),
+    'memory': (memory.run, {'sizes': (1000, 10000)}),
+    'startup': (startup.run, {'repeat': 3}),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', metavar='name',
+                        help=f'benchmarks to run, out of {", ".join(BENCHMARKS)} (default: all)')
+    parser.add_argument('--quick', action='store_true', help='smaller sizes, for a smoke test')
+    parser.add_argument('--output', help='file to write the JSON to (default: stdout)')
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(sorted(unknown))}')
+
+    report = {
+        'version': ctf.__version__,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'quick': args.quick,
+        'results': {}
+    }
+    for name in args.names or BENCHMARKS:
+        benchmark, quick = BENCHMARKS[name]
+        report['results'][name] = benchmark(**quick) if args.quick else benchmark()
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if not report['results'].get('startup', {}).get('within_budget', True):
+        sys.stderr.write('import ctf exceeded its budget of {} seconds\n'.format(startup.BUDGET))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Games used by the benchmarks."""
+import time
+
+import numpy as np
+
+from ctf.api import Ctf
+from ctf.pieces import Flag, Unit
+from ctf.q_learning.impexp import ImpExp
+
+
+def make_game(height=10, width=8, units=(2, 2), impexp=None):
+    """Returns a `Ctf` game on a walled `height` by `width` board.
+
+    Team 0 starts on the second row from the left, team 1 on the second
+    to last row from the right, and each flag sits mid-row in front of
+    its team. One inner wall breaks the symmetry of the middle row.
+
+    Args:
+        units (:obj:`tuple`): Number of units of each team, at most
+            `width - 2` each.
+        impexp (:obj:`ImpExp`, optional): Shared by all units. Defaults
+            to a new `ImpExp` that neither imports nor exports.
+
+    """
+    board = np.zeros((height, width), dtype=int)
+    board[0, :] = board[-1, :] = board[:, 0] = board[:, -1] = 1
+    board[height // 2, 2] = 1
+
+    impexp = impexp if impexp is not None else ImpExp()
+    game = Ctf()
+    game.new_game(
+        board,
+        (
+            [Unit(f'A{i}', 0, (1, 1 + i), impexp) for i in range(units[0])],
+            [Unit(f'B{i}', 1, (height - 2, width - 2 - i), impexp) for i in range(units[1])]
+        ),
+        (Flag(0, (1, width // 2)), Flag(1, (height - 2, width // 2 - 1)))
+    )
+    return game
+
+
+def best_of(repeat, setup, func):
+    """Fastest of `repeat` runs of `func` over the items from `setup`.
+
+    `setup` is called before every run, outside of the timing, and
+    returns the items `func` is called with one at a time.
+
+    Returns:
+        :obj:`float`: Seconds per call of the fastest run.
+
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        items = setup()
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, (time.perf_counter() - start) / len(items))
+    return best
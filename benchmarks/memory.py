@@ -0,0 +1,63 @@
+"""Peak memory of the q-values as their number of states grows."""
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.games import make_game
+
+SIZES = (1000, 10000, 100000)
+
+
+def _keys(game, count, rng):
+    """`count` distinct observations of the first unit of `game`."""
+    height, width = game.board.shape
+    allies = len(game.units[0]) - 1
+    enemies = len(game.units[1])
+    cells = np.array([(y, x) for y in range(height) for x in range(width) if game.board[y][x] == 0])
+
+    keys = set()
+    while len(keys) < count:
+        chosen = cells[rng.integers(len(cells), size=1 + allies + enemies)].tolist()
+        keys.add((
+            tuple(chosen[0]),
+            tuple(sorted(map(tuple, chosen[1:1 + allies]))),
+            tuple(sorted(map(tuple, chosen[1 + allies:])))
+        ))
+    return list(keys)
+
+
+def run(sizes=SIZES, height=40, width=32, units=(2, 2), seed=0):
+    """Measures the memory taken by `sizes` states learned by one unit.
+
+    Each state is imported and updated once, as in training, so the
+    measurement includes the `ImpExp` import cache and the rows copied
+    on first write.
+
+    Returns:
+        :obj:`list`: One `dict` per size with the `peak_bytes` and
+        `current_bytes` traced by `tracemalloc` and `bytes_per_state`.
+
+    """
+    rng = np.random.default_rng(seed)
+    game = make_game(height, width, units)
+    keys = _keys(game, max(sizes), rng)
+
+    results = []
+    for size in sizes:
+        unit = make_game(height, width, units).units[0][0]
+
+        tracemalloc.start()
+        for key in keys[:size]:
+            q = unit.impexp.get_q_values(unit, key).copy()
+            q[0] = 1.0
+            unit.q_values[key] = q
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append({
+            'states': size,
+            'peak_bytes': peak,
+            'current_bytes': current,
+            'bytes_per_state': current / size
+        })
+    return results
@@ -0,0 +1,84 @@
+"""Microbenchmarks of the functions called on every step."""
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks.games import best_of, make_game
+from ctf.q_learning.impexp import ImpExp
+from ctf.q_learning.model import Model
+
+
+def _trajectory(model, steps):
+    states = []
+    for _ in range(steps):
+        model.run()
+        states.append(model.state.copy())
+    return states
+
+
+def run(height=10, width=8, units=(2, 2), number=2000, repeat=5, warmup=5000, seed=0):
+    """Times `Model.run`, `Ctf.copy`, `Ctf.observation`,
+    `Ctf.update_before`, `Actor.get_q_values` and
+    `ImpExp.export_q_values`.
+
+    Every function runs `number` times per repeat on states visited by
+    a `Model` trained for `warmup` steps, so lookups mostly hit.
+
+    Returns:
+        :obj:`dict`: Best seconds per call of every function.
+
+    """
+    rng = np.random.default_rng(seed)
+    game = make_game(height, width, units)
+    model = Model(game, seed=seed)
+    for _ in range(warmup):
+        model.run()
+    states = _trajectory(model, number)
+    out = states[0].copy()
+
+    def unit_states():
+        return [(state, unit) for state in states for unit in state.get_actors()][:number]
+
+    def cold_unit_states():
+        for state in states:
+            state._clear_observations()
+        return unit_states()
+
+    def moved_states():
+        moved = []
+        for state in states:
+            state = state.copy()
+            actors = state.get_actors()
+            state.apply_actions(list(zip(actors, rng.integers(5, size=len(actors)).tolist())))
+            moved.append(state)
+        return moved
+
+    results = {
+        'Model.run': best_of(repeat, lambda: range(number), lambda _: model.run()),
+        'Ctf.copy': best_of(repeat, lambda: states, lambda state: state.copy()),
+        'Ctf.copy(out)': best_of(repeat, lambda: states, lambda state: state.copy(out)),
+        'Ctf.observation': best_of(repeat, cold_unit_states, lambda item: item[0].observation(item[1])),
+        'Ctf.observation (cached)': best_of(repeat, unit_states, lambda item: item[0].observation(item[1])),
+        'Ctf.update_before': best_of(repeat, moved_states, lambda state: state.update_before()),
+        'Actor.get_q_values': best_of(repeat, unit_states, lambda item: item[1].get_q_values(item[0])),
+    }
+
+    def missing_unit_states():
+        # Units of the copies own their table, emptied before every run.
+        items = unit_states()
+        for _, unit in items:
+            unit.q_values = {}
+        return items
+
+    results['Actor.get_q_values (miss)'] = best_of(
+        repeat, missing_unit_states, lambda item: item[1].get_q_values(item[0])
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        impexp = ImpExp(output_file=os.path.join(directory, 'q_values.npy'))
+        actor = game.units[0][0]
+        results['ImpExp.export_q_values'] = best_of(repeat, lambda: [actor] * number, impexp.export_q_values)
+        impexp.close()
+
+    return results
@@ -0,0 +1,62 @@
+"""Time taken to start Python and import the package."""
+import subprocess
+import sys
+import time
+
+MODULES = ('ctf', 'ctf.q_learning.model')
+# Seconds `import ctf` may take beyond an empty interpreter. Most of it is
+# NumPy; rendering and pyglet are only imported by `Ctf.render`.
+BUDGET = 0.25
+
+
+def _best(code, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _import_times(module):
+    """Cumulative microseconds of every module imported by `module`,
+    as reported by `python -X importtime`."""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        check=True, capture_output=True, text=True
+    ).stderr
+
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def run(modules=MODULES, repeat=5, budget=BUDGET):
+    """Measures the import time of each of `modules` in a fresh process.
+
+    Returns:
+        :obj:`dict`: Per module, the best wall-clock `seconds` of the
+        import beyond an empty interpreter, whether it imports `pyglet`,
+        and the `cumulative_us` of the slowest ten modules it imports.
+        `within_budget` tells whether `import ctf` took at most `budget`
+        seconds.
+
+    """
+    baseline = _best('pass', repeat)
+    results = {'interpreter_seconds': baseline}
+    for module in modules:
+        times = _import_times(module)
+        results[module] = {
+            'seconds': _best(f'import {module}', repeat) - baseline,
+            'pyglet': 'pyglet' in times,
+            'cumulative_us': dict(sorted(times.items(), key=lambda item: -item[1])[:10])
+        }
+
+    seconds = results['ctf']['seconds'] if 'ctf' in results else _best('import ctf', repeat) - baseline
+    results['budget_seconds'] = budget
+    results['within_budget'] = seconds <= budget
+    return results
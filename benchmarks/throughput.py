@@ -0,0 +1,40 @@
+"""Training throughput over board sizes and unit counts."""
+import time
+
+from benchmarks.games import make_game
+from ctf.q_learning.model import Model
+
+SIZES = ((10, 8), (20, 16), (40, 32))
+UNITS = ((1, 1), (2, 2), (3, 3))
+
+
+def run(sizes=SIZES, units=UNITS, steps=2000, seed=0):
+    """Runs `steps` steps of `Model` on every board size and unit count.
+
+    Returns:
+        :obj:`list`: One `dict` per configuration with its `steps`,
+        `seconds`, `steps_per_second` and the number of `states` learned
+        by the first unit.
+
+    """
+    results = []
+    for height, width in sizes:
+        for counts in units:
+            game = make_game(height, width, counts)
+            model = Model(game, seed=seed)
+
+            start = time.perf_counter()
+            for _ in range(steps):
+                model.run()
+            seconds = time.perf_counter() - start
+
+            results.append({
+                'height': height,
+                'width': width,
+                'units': list(counts),
+                'steps': steps,
+                'seconds': seconds,
+                'steps_per_second': steps / seconds,
+                'states': len(game.units[0][0].q_values)
+            })
+    return results
@@ -1,2 +1,3 @@
 from ctf.api import Ctf
+from ctf.vector import VectorCtf
 from ctf.version import VERSION as __version__
@@ -1,8 +1,10 @@
 """Catpure The Flag (Ctf) state machine and game logic."""
-import itertools
+import collections
+import functools
+
+import numpy as np
 
 from ctf.q_learning.environment import Environment
-from ctf.rendering import Renderer
 
 UP = 0
 DOWN = 1
@@ -10,6 +12,70 @@ RIGHT = 2
 LEFT = 3
 STAY = 4
 
+# Actions of a state in its left/right mirror image.
+MIRRORED_ACTIONS = np.array([UP, DOWN, LEFT, RIGHT, STAY])
+
+
+def move_table(board):
+    """Next cell of every move on `board`.
+
+    Args:
+        board (:obj:`numpy.ndarray`): Board, 0 marking free cells.
+
+    Returns:
+        :obj:`numpy.ndarray`: `(2, height, width, 5)` array of flat cell
+        indices (`y * width + x`) reached by each action, for the
+        orientation of team 0 and the inverted one of team 1. Moves into
+        walls or off the board stay in place.
+
+    """
+    height, width = board.shape
+    moves = np.empty((2, height, width, 5), dtype=np.int64)
+    steps = {UP: (-1, 0), DOWN: (1, 0), RIGHT: (0, 1), LEFT: (0, -1), STAY: (0, 0)}
+    for y in range(height):
+        for x in range(width):
+            for action, (dy, dx) in steps.items():
+                ny, nx = y + dy, x + dx
+                if 0 <= ny < height and 0 <= nx < width and board[ny][nx] == 0:
+                    moves[0, y, x, action] = ny * width + nx
+                else:
+                    moves[0, y, x, action] = y * width + x
+    moves[1] = moves[0][..., [DOWN, UP, LEFT, RIGHT, STAY]]
+    return moves
+
+
+def distance_field(board, sources):
+    """Shortest path distances on `board` from the nearest of `sources`.
+
+    Args:
+        board (:obj:`numpy.ndarray`): Board, 0 marking free cells.
+        sources (:obj:`list`): `(y, x)` free cells to measure from.
+
+    Returns:
+        :obj:`numpy.ndarray`: `(height, width)` array of the number of
+        moves through free cells to the nearest source, -1 for walls and
+        cells no source can reach.
+
+    """
+    height, width = board.shape
+    free = (board == 0).tolist()
+    distances = [[-1] * width for _ in range(height)]
+    queue = collections.deque()
+    for y, x in sources:
+        if distances[y][x] == -1:
+            distances[y][x] = 0
+            queue.append((y, x))
+
+    while queue:
+        y, x = queue.popleft()
+        distance = distances[y][x] + 1
+        for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+            if 0 <= ny < height and 0 <= nx < width and free[ny][nx] and distances[ny][nx] == -1:
+                distances[ny][nx] = distance
+                queue.append((ny, nx))
+
+    return np.array(distances, dtype=np.int64)
+
 
 class Ctf(Environment):
     """`Ctf` class, handles a game of CTF.
@@ -23,11 +89,28 @@ class Ctf(Environment):
                  jail_timer=5,
                  flags=None,
                  units=None,
-                 renderer=None
+                 renderer=None,
+                 canonical=False,
+                 shaping=0.0
                  ):
         """Initialization of `Ctf` object.
+
+        `new_game` precomputes `flag_distances` and `base_distances`,
+        `(2, height, width)` arrays of the shortest path distances of
+        every cell to the flag of each team and to the nearest starting
+        position of its units, see `distance_field`.
+
+        Args:
+            canonical (:obj:`bool`, optional): Whether observations are
+                canonicalized under the left/right mirror symmetry of the
+                game, if it has one. Defaults to `False`.
+            shaping (:obj:`float`, optional): Weight of the distance
+                shaped term of `cost`, which adds `shaping` times the
+                change in distance to the enemy flag of a move. Defaults
+                to 0, no shaping.
+
         """
-        self.board = board
+        self._set_board(board)
         self.turn = turn
         self.score = score
         self.captures = captures
@@ -35,41 +118,174 @@ class Ctf(Environment):
         self.flags = flags
         self.units = units
         self.renderer = renderer
+        self.canonical = canonical
+        self.shaping = shaping
+        self.symmetric = self._is_symmetric()
+        self._set_distances()
+        # Observations by unit id, cleared whenever a position changes,
+        # and the ids of units whose observation is mirrored.
+        self._observations = {}
+        self._mirrored = set()
+        # Whether an enemy is next to the flag of each team, `None` until
+        # computed, cleared along with the observations.
+        self._threats = [None, None]
+
+    def _set_board(self, board, source=None):
+        """Sets `board` and the lookup tables derived from it, reusing
+        those of `source` if it has the same board."""
+        self.board = board
+
+        if board is None:
+            self.moves = self._next_positions = None
+        elif source is not None and source.board is board:
+            self.moves = source.moves
+            self._next_positions = source._next_positions
+        else:
+            self.moves = move_table(board)
+            positions = [divmod(cell, board.shape[1]) for cell in range(board.size)]
+            self._next_positions = [
+                [[[positions[cell] for cell in cells] for cells in row] for row in orientation]
+                for orientation in self.moves.tolist()
+            ]
+
+    def _set_distances(self, source=None):
+        """Sets the distance fields of the board, flags and units, reusing
+        those of `source` if given, which must have the same ones."""
+        if source is not None:
+            self.flag_distances = source.flag_distances
+            self.base_distances = source.base_distances
+            self._flag_distances = source._flag_distances
+        elif self.board is None or self.flags is None or self.units is None:
+            self.flag_distances = self.base_distances = self._flag_distances = None
+        else:
+            self.flag_distances = np.stack([
+                distance_field(self.board, [flag.initial_position]) for flag in self.flags
+            ])
+            self.base_distances = np.stack([
+                distance_field(self.board, [unit.initial_position for unit in units]) for units in self.units
+            ])
+            # Nested lists, for scalar lookups in `cost`.
+            self._flag_distances = self.flag_distances.tolist()
+
+    def _is_symmetric(self):
+        """Whether observations are canonicalized: `canonical` is set and
+        the board, both flags and the starting cells of each team, where
+        captured units respawn, are their own left/right mirror image."""
+        if not self.canonical or self.board is None or self.flags is None or self.units is None:
+            return False
+        width = self.board.shape[1]
+        return (
+            np.array_equal(self.board, self.board[:, ::-1])
+            and all(flag.initial_position[1] == width - 1 - flag.initial_position[1] for flag in self.flags)
+            and all(
+                sorted((y, width - 1 - x) for y, x in (unit.initial_position for unit in units))
+                == sorted(unit.initial_position for unit in units)
+                for units in self.units
+            )
+        )
+
+    def _clear_observations(self):
+        self._observations.clear()
+        self._mirrored.clear()
+        self._threats[0] = self._threats[1] = None
 
     def __eq__(self, other):
         return self.units == other.units
 
     def __hash__(self):
-        prime = 31
-        hashcode = 1
-        for i in range(2):
-            hashcode = prime * hashcode + hash(tuple(self.units[i]))
-        return hashcode
+        return hash((tuple(self.units[0]), tuple(self.units[1])))
 
     def _rotate_position(self, position):
         height, width = self.board.shape
         return height - position[0] - 1, width - position[1] - 1
 
     def observation(self, unit):
-        """result is orientation independent"""
+        """result is orientation independent
+
+        Observations are cached until a position changes through
+        `apply_actions`, `update_before`, `reset`, `new_game` or `copy`,
+        so repeated calls within a step are a single dict lookup.
+        """
+        observation = self._observations.get(id(unit))
+        if observation is None:
+            observation = self._observe(unit)
+            if self.symmetric:
+                mirrored = self._mirror(observation)
+                if mirrored < observation:
+                    observation = mirrored
+                    self._mirrored.add(id(unit))
+            self._observations[id(unit)] = observation
+        return observation
+
+    def permutation(self, unit):
+        """`MIRRORED_ACTIONS` if the observation of `unit` is the mirror
+        image of its state, see `Environment.permutation`.
+
+        With `canonical` on a symmetric game, `observation` returns the
+        smaller of the observation and its left/right mirror image, so
+        mirrored states share their q-values with LEFT and RIGHT swapped.
+        """
+        if not self.symmetric:
+            return None
+        self.observation(unit)
+        return MIRRORED_ACTIONS if id(unit) in self._mirrored else None
+
+    def _mirror(self, observation):
+        width = self.board.shape[1]
+        position, allies, enemies = observation
+        return (
+            (position[0], width - 1 - position[1]),
+            tuple(sorted([(y, width - 1 - x) for y, x in allies])),
+            tuple(sorted([(y, width - 1 - x) for y, x in enemies]))
+        )
+
+    def _observe(self, unit):
         allies = self.units[unit.team][:]
         allies.remove(unit)
         if unit.team == 0:
             return (
                 unit.position,
-                tuple([unit.position for unit in sorted(allies)]),
-                tuple([unit.position for unit in sorted(self.units[1])])
+                tuple(sorted([unit.position for unit in allies])),
+                tuple(sorted([unit.position for unit in self.units[1]]))
             )
         else:
             return (
                 self._rotate_position(unit.position),
-                tuple([self._rotate_position(unit.position) for unit in sorted(allies)]),
-                tuple([self._rotate_position(unit.position) for unit in sorted(self.units[0])])
+                tuple(sorted([self._rotate_position(unit.position) for unit in allies])),
+                tuple(sorted([self._rotate_position(unit.position) for unit in self.units[0]]))
             )
 
-    def copy(self):
-        return Ctf(
-            board=self.board,
+    def copy(self, out=None):
+        """Copies the game, into `out` if given.
+
+        Copying into an existing game with the same units reuses its
+        `Flag` and `Unit` objects instead of allocating new ones; `out`
+        gets new ones if its teams differ in size, e.g. after `new_game`.
+        """
+        if out is not None:
+            if out.units is None or any(len(units) != len(other) for units, other in zip(self.units, out.units)):
+                out.units = ([unit.copy() for unit in self.units[0]], [unit.copy() for unit in self.units[1]])
+            if out.flags is None:
+                out.flags = (self.flags[0].copy(), self.flags[1].copy())
+            if out.board is not self.board:
+                out._set_board(self.board, self)
+            out._clear_observations()
+            out._set_distances(self)
+            out.canonical = self.canonical
+            out.shaping = self.shaping
+            out.symmetric = self.symmetric
+            out.turn = self.turn
+            out.score = self.score
+            out.captures = self.captures
+            out.jail_timer = self.jail_timer
+            out.renderer = self.renderer
+            for i in range(2):
+                self.flags[i].copy(out.flags[i])
+                for unit, other in zip(self.units[i], out.units[i]):
+                    unit.copy(other)
+            return out
+
+        game = Ctf(
             turn=self.turn,
             score=self.score,
             captures=self.captures,
@@ -79,13 +295,29 @@ class Ctf(Environment):
                 [unit.copy() for unit in self.units[0]],
                 [unit.copy() for unit in self.units[1]]
             ),
-            renderer=self.renderer
+            renderer=self.renderer,
+            canonical=self.canonical,
+            shaping=self.shaping
         )
+        game._set_board(self.board, self)
+        game._set_distances(self)
+        game.symmetric = self.symmetric
+        return game
 
     @staticmethod
     def manhattan_distance(pos1, pos2):
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
 
+    def threatened(self, team):
+        """Whether a unit of the other team is one move away from the flag
+        of `team`, cached until a position changes."""
+        threatened = self._threats[team]
+        if threatened is None:
+            distances = self._flag_distances[team]
+            threatened = any(distances[y][x] == 1 for y, x in (enemy.position for enemy in self.units[~team]))
+            self._threats[team] = threatened
+        return threatened
+
     def cost(self, unit, direction):
         cost = 0.5
 
@@ -94,64 +326,67 @@ class Ctf(Environment):
         if new_position == self.flags[~unit.team].position:
             cost -= 0.5
 
-        for enemy in self.units[~unit.team]:
-            if self.manhattan_distance(enemy.position, self.flags[unit.team].position) == 1:
-                cost += 0.5
-                break
+        if self.threatened(unit.team):
+            cost += 0.5
+
+        if self.shaping and not unit.in_jail():
+            distances = self._flag_distances[~unit.team]
+            y, x = unit.position
+            ny, nx = self._new_position(unit, direction, inverted=unit.team == 1)
+            cost += self.shaping * (distances[ny][nx] - distances[y][x])
 
         return cost
 
     def _new_position(self, unit, direction, inverted=False):
         """result is semi orientation independent"""
         y, x = unit.position
-
-        if not inverted:
-            if direction == UP and self.board[y - 1][x] == 0:
-                return y - 1, x
-            elif direction == DOWN and self.board[y + 1][x] == 0:
-                return y + 1, x
-            elif direction == LEFT and self.board[y][x - 1] == 0:
-                return y, x - 1
-            elif direction == RIGHT and self.board[y][x + 1] == 0:
-                return y, x + 1
-        else:
-            if direction == DOWN and self.board[y - 1][x] == 0:
-                return y - 1, x
-            elif direction == UP and self.board[y + 1][x] == 0:
-                return y + 1, x
-            elif direction == RIGHT and self.board[y][x - 1] == 0:
-                return y, x - 1
-            elif direction == LEFT and self.board[y][x + 1] == 0:
-                return y, x + 1
-
-        return y, x
+        return self._next_positions[inverted][y][x][direction]
 
     def apply_actions(self, actions):
         """result is orientation independent"""
+        moved = False
         for unit, action in actions:
             if unit.in_jail():
                 unit.jail_timer -= 1
             else:
-                unit.position = self._new_position(unit, action, inverted=unit.team == 1)
+                position = self._new_position(unit, action, inverted=unit.team == 1)
+                if position != unit.position:
+                    unit.position = position
+                    moved = True
+
+        if moved:
+            self._clear_observations()
 
     def _capture(self, unit):
         unit.jail_timer = self.jail_timer
         unit.position = unit.initial_position
+        self._clear_observations()
         if unit.team == 0:
             self.captures = (self.captures[0], self.captures[1] + 1)
         else:
             self.captures = (self.captures[0] + 1, self.captures[1])
 
     def update_before(self):
-        for unit0, unit1 in itertools.product(self.units[0], self.units[1]):
-            if unit0.in_jail() or unit1.in_jail():
-                continue
-
-            if unit0.position == unit1.position:
-                if unit0.position[0] < self.board.shape[0] / 2:
-                    self._capture(unit0)
+        # Free team 1 units by position, so that every collision is found
+        # in one pass over team 0. A collision in the top half jails every
+        # team 0 unit on the cell, one in the bottom half every team 1
+        # unit on it.
+        enemies = {}
+        for unit in self.units[1]:
+            if not unit.in_jail():
+                enemies.setdefault(unit.position, []).append(unit)
+
+        if enemies:
+            half = self.board.shape[0] / 2
+            for unit in self.units[0]:
+                if unit.in_jail() or unit.position not in enemies:
+                    continue
+
+                if unit.position[0] < half:
+                    self._capture(unit)
                 else:
-                    self._capture(unit1)
+                    for enemy in enemies.pop(unit.position):
+                        self._capture(enemy)
 
         for i in range(2):
             if self.flags[~i].grounded:
@@ -184,43 +419,86 @@ class Ctf(Environment):
         return self.units[0] + self.units[1]
 
     def new_game(self, board, units, flags):
-        self.board = board
+        self._set_board(board)
         self.units = units
         self.flags = flags
+        self._set_distances()
+        self.symmetric = self._is_symmetric()
+        self._clear_observations()
 
     def reset(self):
         for i in range(2):
             for unit in self.units[i]:
                 unit.reset()
             self.flags[i].reset()
+        self._clear_observations()
 
-    def render(self):
+    def render(self, mode='human', writer=None, threaded=False, fps=30):
         """Method for rendering a frame.
 
         If this method is called and the `Ctf` instance currently has no
-        renderer, the `ctf.rendering.Renderer` is imported and
-        intialized which requires OpenGL.
+        renderer, one is created for `mode`: with `'human'` the
+        `ctf.rendering.Renderer` is imported and intialized which
+        requires OpenGL, with `'rgb_array'` the
+        `ctf.headless.HeadlessRenderer` is used, which needs neither
+        OpenGL nor a display.
 
         Once the renderer is initialized and stored on the `Ctf` object
-        it will create a window displaying the state of the game. All
-        subsequent calls will utilize the intialized renderer stored on
-        the `Ctf` object.
+        it will create a window displaying the state of the game, or
+        draw into an array. All subsequent calls will utilize the
+        intialized renderer stored on the `Ctf` object.
+
+        With `threaded` the renderer lives on a
+        `ctf.render_thread.RenderThread` instead: each call only
+        publishes a snapshot of the game and returns, and the thread
+        draws the latest snapshot at most `fps` times per second,
+        dropping the ones in between. Call `self.renderer.stop()` to
+        end it.
 
         >>> import ctf
         >>> game = ctf.Ctf()
         >>> game.new_game()
         >>> game.render()
 
+        Args:
+            mode (:obj:`str`, optional): `'human'` or `'rgb_array'`.
+                Defaults to `'human'`.
+            writer (:obj:`ctf.headless.PngWriter` or
+                :obj:`ctf.headless.RawWriter`, optional): Receives the
+                frames of a headless renderer created by this call.
+            threaded (:obj:`bool`, optional): Whether a renderer created
+                by this call draws on its own thread. Defaults to `False`.
+            fps (:obj:`float`, optional): Maximum frames per second of a
+                threaded renderer. Defaults to 30.
+
+        Returns:
+            :obj:`numpy.ndarray`: The `(height, width, 3)` frame for a
+            headless renderer, else `None`.
+
         Raises:
             GameNotFoundError: Raised if this method is called prior to
                 `new_game`.
+            Exception: Raised by the renderer of a threaded render, when
+                it fails to start or to draw a frame.
 
         """
         size = (800, 600)
         pad = [60.0, 20.0]
 
         if self.renderer is None:
-            self.renderer = Renderer(
+            if mode == 'human':
+                from ctf.rendering import Renderer
+
+                renderer = Renderer
+            elif mode == 'rgb_array':
+                from ctf.headless import HeadlessRenderer
+
+                renderer = functools.partial(HeadlessRenderer, writer=writer)
+            else:
+                raise ValueError(f'unknown render mode {mode!r}')
+
+            renderer = functools.partial(
+                renderer,
                 width=size[0],
                 height=size[1],
                 x_pad=pad[0],
@@ -229,13 +507,33 @@ class Ctf(Environment):
                 unit_pad=((size[1] - pad[1] * 2) / self.board.shape[0]) // 5
             )
 
-        self.renderer.init_window()
-        self.renderer.draw_scoreboard(
-            dims=self.board.shape,
-            turn=self.turn,
-            score=self.score,
-            captures=self.captures
+            if threaded:
+                from ctf.render_thread import RenderThread
+
+                thread = RenderThread(renderer, self._draw, fps)
+                thread.start()
+                self.renderer = thread
+            else:
+                self.renderer = renderer()
+
+        if hasattr(self.renderer, 'publish'):
+            from ctf.render_thread import snapshot
+
+            self.renderer.publish(snapshot(self))
+            return None
+
+        return self._draw(self.renderer, self)
+
+    @staticmethod
+    def _draw(renderer, game):
+        """Draws a frame of `game`, a `Ctf` or a snapshot of one."""
+        renderer.init_window()
+        renderer.draw_scoreboard(
+            dims=game.board.shape,
+            turn=game.turn,
+            score=game.score,
+            captures=game.captures
         )
-        self.renderer.draw_grid(self.board)
-        self.renderer.draw_pieces(self.board, self.units, self.flags)
-        self.renderer.show()
+        renderer.draw_grid(game.board)
+        renderer.draw_pieces(game.board, game.units, game.flags)
+        return renderer.show()
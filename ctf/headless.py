@@ -0,0 +1,271 @@
+"""Headless rendering of Capture The Flag (Ctf) boards into NumPy arrays."""
+import os
+import struct
+import zlib
+
+import numpy as np
+
+# 3x5 bitmap glyphs, one string per row, '#' marking a set pixel.
+_GLYPHS = {
+    '0': ('###', '#.#', '#.#', '#.#', '###'),
+    '1': ('.#.', '##.', '.#.', '.#.', '###'),
+    '2': ('###', '..#', '###', '#..', '###'),
+    '3': ('###', '..#', '.##', '..#', '###'),
+    '4': ('#.#', '#.#', '###', '..#', '..#'),
+    '5': ('###', '#..', '###', '..#', '###'),
+    '6': ('###', '#..', '###', '#.#', '###'),
+    '7': ('###', '..#', '.#.', '.#.', '.#.'),
+    '8': ('###', '#.#', '###', '#.#', '###'),
+    '9': ('###', '#.#', '###', '..#', '###'),
+    'A': ('.#.', '#.#', '###', '#.#', '#.#'),
+    'B': ('##.', '#.#', '##.', '#.#', '##.'),
+    'C': ('.##', '#..', '#..', '#..', '.##'),
+    'D': ('##.', '#.#', '#.#', '#.#', '##.'),
+    'E': ('###', '#..', '##.', '#..', '###'),
+    'F': ('###', '#..', '##.', '#..', '#..'),
+    'G': ('.##', '#..', '#.#', '#.#', '.##'),
+    'H': ('#.#', '#.#', '###', '#.#', '#.#'),
+    'I': ('###', '.#.', '.#.', '.#.', '###'),
+    'J': ('..#', '..#', '..#', '#.#', '.#.'),
+    'K': ('#.#', '#.#', '##.', '#.#', '#.#'),
+    'L': ('#..', '#..', '#..', '#..', '###'),
+    'M': ('#.#', '###', '###', '#.#', '#.#'),
+    'N': ('##.', '#.#', '#.#', '#.#', '#.#'),
+    'O': ('.#.', '#.#', '#.#', '#.#', '.#.'),
+    'P': ('##.', '#.#', '##.', '#..', '#..'),
+    'Q': ('.#.', '#.#', '#.#', '##.', '.##'),
+    'R': ('##.', '#.#', '##.', '#.#', '#.#'),
+    'S': ('.##', '#..', '.#.', '..#', '##.'),
+    'T': ('###', '.#.', '.#.', '.#.', '.#.'),
+    'U': ('#.#', '#.#', '#.#', '#.#', '###'),
+    'V': ('#.#', '#.#', '#.#', '#.#', '.#.'),
+    'W': ('#.#', '#.#', '###', '###', '#.#'),
+    'X': ('#.#', '#.#', '.#.', '#.#', '#.#'),
+    'Y': ('#.#', '#.#', '.#.', '.#.', '.#.'),
+    'Z': ('###', '..#', '.#.', '#..', '###'),
+    ',': ('...', '...', '...', '.#.', '#..'),
+    '-': ('...', '...', '###', '...', '...'),
+    ' ': ('...', '...', '...', '...', '...'),
+}
+_GLYPHS = {char: np.array([[c == '#' for c in row] for row in rows]) for char, rows in _GLYPHS.items()}
+
+
+class PngWriter(object):
+    """Writes every `every`-th frame to `directory` as numbered PNGs."""
+
+    def __init__(self, directory, every=1):
+        self.directory = directory
+        self.every = every
+        self.frames = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, frame):
+        if self.frames % self.every == 0:
+            path = os.path.join(self.directory, 'frame_{:06d}.png'.format(self.frames // self.every))
+            with open(path, 'wb') as f:
+                f.write(png(frame))
+        self.frames += 1
+
+    def close(self):
+        pass
+
+
+class RawWriter(object):
+    """Appends every `every`-th frame to one file of raw RGB bytes.
+
+    The file holds `(height, width, 3)` `uint8` frames back to back and
+    can be read with `np.fromfile(path, np.uint8).reshape(-1, height,
+    width, 3)`.
+    """
+
+    def __init__(self, path, every=1):
+        self.every = every
+        self.frames = 0
+        self.file = open(path, 'ab')
+
+    def write(self, frame):
+        if self.frames % self.every == 0:
+            self.file.write(np.ascontiguousarray(frame).tobytes())
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+
+def png(frame):
+    """Encodes a `(height, width, 3)` `uint8` array as PNG bytes."""
+    height, width, _ = frame.shape
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = frame.reshape(height, -1)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)),
+        chunk(b'IEND', b'')
+    ])
+
+
+class HeadlessRenderer(object):
+    """`HeadlessRenderer` class, rasterizes a `Ctf` game without a window.
+
+    It takes the same arguments and draw calls as `ctf.rendering.Renderer`
+    but draws into `frame`, a `(height, width, 3)` `uint8` array, with
+    NumPy only. The grid is rasterized once per board and copied into
+    every frame.
+    """
+
+    def __init__(self, width, height, x_pad, y_pad, box, unit_pad, writer=None):
+        """Initialization of `HeadlessRenderer` object.
+
+        Args:
+            writer (:obj:`PngWriter` or :obj:`RawWriter`, optional):
+                Receives every frame completed by `show`.
+
+        """
+        self.width = width
+        self.height = height
+        self.x_pad = x_pad
+        self.y_pad = y_pad
+        self.box = box
+        self.unit_pad = unit_pad
+        self.writer = writer
+
+        self.frame = np.full((height, width, 3), 255, dtype=np.uint8)
+        self._grid_board = None
+        self._grid = None
+        self._grid_region = None
+
+    def _fill(self, l, b, r, t, color, frame=None):
+        """Fills the rectangle with window coordinates (origin at the
+        bottom left, as in OpenGL) `l, b, r, t`."""
+        frame = self.frame if frame is None else frame
+        rows = slice(max(int(round(self.height - t)), 0), max(int(round(self.height - b)), 0))
+        columns = slice(max(int(round(l)), 0), max(int(round(r)), 0))
+        frame[rows, columns] = color
+
+    def _text(self, text, x, y, size, color, anchor_x='left', anchor_y='bottom'):
+        scale = max(int(size) // 4, 1)
+        glyphs = [_GLYPHS.get(char.upper(), _GLYPHS[' ']) for char in text]
+        if not glyphs:
+            return 0, 0
+        bitmap = np.hstack([np.pad(glyph, ((0, 0), (0, 1))) for glyph in glyphs])[:, :-1]
+        bitmap = bitmap.repeat(scale, axis=0).repeat(scale, axis=1)
+        height, width = bitmap.shape
+
+        left = x - {'left': 0, 'center': width / 2.0, 'right': width}[anchor_x]
+        bottom = y - {'bottom': 0, 'center': height / 2.0, 'top': height}[anchor_y]
+        top = int(round(self.height - bottom - height))
+        left = int(round(left))
+
+        rows = slice(max(top, 0), min(top + height, self.height))
+        columns = slice(max(left, 0), min(left + width, self.width))
+        if rows.start >= rows.stop or columns.start >= columns.stop:
+            return width, height
+        mask = bitmap[rows.start - top:rows.stop - top, columns.start - left:columns.stop - left]
+        self.frame[rows, columns][mask] = color
+        return width, height
+
+    def draw_grid(self, board):
+        """Draws the grid of `board`, see `Renderer.draw_grid`."""
+        if self._grid_board is not board:
+            self._grid = self.frame.copy()
+            dims = board.shape
+            odd = True
+            for y in range(dims[0]):
+                for x in range(dims[1]):
+                    if board[y][x] == 0:
+                        if y < dims[0] / 2:
+                            color = [181, 244, 171] if odd else [85, 152, 0]
+                        else:
+                            color = [218, 249, 197] if odd else [170, 203, 0]
+                    else:
+                        color = [50, 50, 50]
+                    odd = not odd
+
+                    self._fill(
+                        self.x_pad + x * self.box,
+                        self.y_pad + y * self.box,
+                        self.x_pad + (x + 1) * self.box,
+                        self.y_pad + (y + 1) * self.box,
+                        color,
+                        self._grid
+                    )
+            self._grid_region = (
+                slice(max(int(round(self.height - self.y_pad - dims[0] * self.box)), 0),
+                      max(int(round(self.height - self.y_pad)), 0)),
+                slice(max(int(round(self.x_pad)), 0), max(int(round(self.x_pad + dims[1] * self.box)), 0))
+            )
+            self._grid_board = board
+
+        self.frame[self._grid_region] = self._grid[self._grid_region]
+
+    def _quad(self, position, board, pad):
+        x = position[1]
+        y = board.shape[0] - (position[0] + 1)
+        return (
+            self.x_pad + x * self.box + pad,
+            self.y_pad + y * self.box + pad,
+            self.x_pad + (x + 1) * self.box - pad,
+            self.y_pad + (y + 1) * self.box - pad
+        )
+
+    def draw_pieces(self, board, units, flags):
+        """Draws units and flags, see `Renderer.draw_pieces`."""
+        for i in range(2):
+            for unit in units[i]:
+                if unit.in_jail():
+                    continue
+
+                if unit.team == 0:
+                    color = [255, 150, 0] if unit.has_flag else [255, 0, 0]
+                else:
+                    color = [0, 150, 255] if unit.has_flag else [0, 0, 255]
+
+                l, b, r, t = self._quad(unit.position, board, self.unit_pad)
+                self._fill(l, b, r, t, color)
+                self._text(unit.name, (l + r) / 2.0, (t + b) / 2.0, 8, [255, 255, 255], 'center', 'center')
+
+            if flags[i].grounded:
+                color = [255, 0, 0] if flags[i].team == 0 else [0, 0, 255]
+                self._fill(*self._quad(flags[i].position, board, self.unit_pad * 2), color)
+
+    def _draw_statistic(self, dims, stats, name, pad=0):
+        grid_limit = self.x_pad + dims[1] * self.box
+        score_x = (self.width + grid_limit) / 2.0
+        top = self.height - self.y_pad - pad
+
+        width, height = self._text(name, score_x, top, 24, [0, 0, 0], 'center', 'top')
+        self._fill(score_x - width / 2.0, top - height - 10, score_x + width / 2.0, top - height - 2, [0, 0, 0])
+
+        bar_top = top - height - 18
+        bar_bottom = top - height * 2 - 18
+        self._fill(score_x - 4, bar_bottom, score_x + 4, bar_top, [0, 0, 0])
+        self._text(str(stats[0]), score_x - 4, bar_top, 24, [255, 0, 0], 'right', 'top')
+        self._text(str(stats[1]), score_x + 8, bar_top, 24, [0, 0, 255], 'left', 'top')
+
+        return self.height - bar_bottom
+
+    def draw_scoreboard(self, dims, turn, score, captures):
+        """Draws the scoreboard, see `Renderer.draw_scoreboard`."""
+        self._text("{:,}".format(turn), self.width, 0, 10, [150, 150, 150], 'right', 'bottom')
+        pad = self._draw_statistic(dims, score, "Score")
+        self._draw_statistic(dims, captures, "Captures", pad)
+
+    def init_window(self):
+        """Clears the frame to white."""
+        self.frame.fill(255)
+
+    def show(self):
+        """Completes the frame, passing it to the writer if any.
+
+        Returns:
+            :obj:`numpy.ndarray`: The frame, overwritten by the next one.
+
+        """
+        if self.writer is not None:
+            self.writer.write(self.frame)
+        return self.frame
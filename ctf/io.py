@@ -1,6 +1,6 @@
 """I/O module."""
 
-import pkg_resources
+from importlib import resources
 
 
 def resource_path(filename):
@@ -14,8 +14,4 @@ def resource_path(filename):
         :obj:`str`: Path to <filename>, relative to resources directory.
 
     """
-    path = pkg_resources.resource_filename(
-        __name__,
-        f'resources/{filename}'
-    )
-    return path
+    return str(resources.files('ctf') / 'resources' / filename)
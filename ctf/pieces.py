@@ -3,6 +3,10 @@ from ctf.q_learning.actor import Actor
 
 
 class Piece(object):
+    # Storage is declared by the concrete pieces, `Unit` also inherits the
+    # slots of `Actor` and Python allows only one base with slots.
+    __slots__ = ()
+
     def __init__(self, team, position, initial_position=None):
         """This class initializes the storage of standard attributes,
         shared amongst the other pieces.
@@ -17,12 +21,7 @@ class Piece(object):
         self.initial_position = initial_position if initial_position is not None else position
 
     def __hash__(self):
-        prime = 31
-        hashcode = 1
-        hashcode = prime * hashcode + self.team
-        hashcode = prime * hashcode + self.position[0]
-        hashcode = prime * hashcode + self.position[1]
-        return hashcode
+        return hash((self.team, self.position))
 
     def __eq__(self, other):
         return self.team == other.team and self.position == other.position
@@ -38,6 +37,8 @@ class Piece(object):
 
 
 class Unit(Piece, Actor):
+    __slots__ = ('team', 'position', 'initial_position', 'name', 'has_flag', 'jail_timer')
+
     def __init__(self, name, team, position, impexp, initial_position=None, has_flag=False, jail_timer=0, q_values=None):
         """Unit piece, representing a controllable character on the board.
         """
@@ -48,18 +49,30 @@ class Unit(Piece, Actor):
         self.jail_timer = jail_timer
 
     def __hash__(self):
-        prime = 31
-        hashcode = 1
-        hashcode = prime * hashcode + Piece.__hash__(self)
-        hashcode = prime * hashcode + self.has_flag
-        hashcode = prime * hashcode + self.in_jail()
-        return hashcode
+        return hash((self.team, self.position, self.has_flag, self.jail_timer > 0))
 
     def __eq__(self, other):
-        return Piece.__eq__(self, other) and self.has_flag == other.has_flag and self.in_jail() == other.in_jail()
+        return (
+            self.position == other.position
+            and self.team == other.team
+            and self.has_flag == other.has_flag
+            and (self.jail_timer > 0) == (other.jail_timer > 0)
+        )
 
-    def copy(self):
-        return Unit(
+    def copy(self, out=None):
+        if out is not None:
+            out.name = self.name
+            out.team = self.team
+            out.position = self.position
+            out.impexp = self.impexp
+            out.initial_position = self.initial_position
+            out.has_flag = self.has_flag
+            out.jail_timer = self.jail_timer
+            out.q_values = self.q_values
+            out.misses = self.misses
+            return out
+
+        unit = Unit(
             name=self.name,
             team=self.team,
             position=(self.position[0], self.position[1]),
@@ -69,6 +82,8 @@ class Unit(Piece, Actor):
             jail_timer=self.jail_timer,
             q_values=self.q_values
         )
+        unit.misses = self.misses
+        return unit
 
     def is_flag(self):
         return False
@@ -86,6 +101,8 @@ class Unit(Piece, Actor):
 
 
 class Flag(Piece):
+    __slots__ = ('team', 'position', 'initial_position', 'grounded')
+
     def __init__(self, team, position, grounded=True):
         """Flag piece, representing one of the team's flags.
 
@@ -100,16 +117,19 @@ class Flag(Piece):
         self.grounded = grounded
 
     def __hash__(self):
-        prime = 31
-        hashcode = 1
-        hashcode = prime * hashcode + super().__hash__()
-        hashcode = prime * hashcode + self.grounded
-        return hashcode
+        return hash((self.team, self.position, self.grounded))
 
     def __eq__(self, other):
-        return super().__eq__(other) and self.grounded == other.grounded
+        return self.position == other.position and self.team == other.team and self.grounded == other.grounded
+
+    def copy(self, out=None):
+        if out is not None:
+            out.team = self.team
+            out.position = self.position
+            out.initial_position = self.initial_position
+            out.grounded = self.grounded
+            return out
 
-    def copy(self):
         return Flag(
             team=self.team,
             position=(self.position[0], self.position[1]),
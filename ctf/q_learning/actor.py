@@ -1,24 +1,56 @@
 class Actor:
+    __slots__ = ('number_actions', 'q_values', 'impexp', 'misses')
+
     def __init__(self, number_actions, q_values=None, impexp=None):
         self.number_actions = number_actions
         self.q_values = q_values if q_values is not None else {}
         self.impexp = impexp
+        # Lookups not found in `q_values`, for `Profiler`.
+        self.misses = 0
 
     def get_q_values(self, state):
         key = state.observation(self)
 
         q = self.q_values.get(key)
-        if q is not None:
-            return q
-
-        q = self.impexp.get_q_values(self, key)
+        if q is None:
+            self.misses += 1
+            q = self.q_values.setdefault(key, self.impexp.get_q_values(self, key))
 
-        self.q_values[key] = q
+        permutation = state.permutation(self)
+        if permutation is not None:
+            return q[permutation]
         return q
 
-    def update_q_values(self, state, action, q_value):
+    def update_q_values(self, state, action, q_value, export=True):
+        """Sets the q-value of `action` in `state` and exports it.
+
+        Returns:
+            :obj:`tuple`: The arguments after `self` of
+            `ImpExp.export_q_values`, for callers that pass `export=False`
+            and export later.
+
+        """
         key = state.observation(self)
+        permutation = state.permutation(self)
+        if permutation is not None:
+            action = permutation[action]
+
+        if getattr(self.q_values, 'locks', ()):
+            # Tables shared with locks write under the lock of the row.
+            q = self.q_values.update(key, action, q_value)
+            if export:
+                self.impexp.export_q_values(self, key, q, action)
+            return key, q, action
 
-        self.q_values[key][action] = q_value
+        q = self.q_values[key]
+        changed = action
+        if not q.flags.writeable:
+            # Imported rows are shared and read-only, copy on first write.
+            q = q.copy()
+            self.q_values[key] = q
+            changed = None
+        q[action] = q_value
 
-        self.impexp.export_q_values(self)
+        if export:
+            self.impexp.export_q_values(self, key, q, changed)
+        return key, q, changed
@@ -0,0 +1,263 @@
+import ast
+import shelve
+import sys
+import threading
+
+# Approximate bytes taken by the entries of one key in the dicts of
+# `BoundedQValues`.
+_DICT_BYTES = 150
+
+
+def _sizeof(key):
+    """Bytes of a key's tuples; coordinates are small cached ints."""
+    size = sys.getsizeof(key)
+    for item in key:
+        if isinstance(item, tuple):
+            size += _sizeof(item)
+    return size
+
+
+class BoundedQValues:
+    def __init__(self, budget, spill=None, headroom=0.1, recent=64):
+        """Q-values kept within about `budget` bytes, used as the
+        `q_values` of an `Actor`.
+
+        When an insertion takes the estimated size over `budget`, entries
+        are evicted until it is `headroom` below it. Entries that were
+        never updated, whose rows are still the read-only ones imported
+        by `ImpExp`, go first, since they are imported again for free.
+        Learned entries follow by fewest visits, then least recent
+        visit; visit counts are halved at every eviction, so entries
+        that were popular long ago age out. The `recent` most recently
+        visited entries are never evicted, as `Actor` updates a row
+        right after looking it up.
+
+        Evicted learned rows are lost, unless `spill` names a `shelve`
+        file where they are written and fetched back from when visited
+        again.
+
+        Args:
+            budget (:obj:`int`): Bytes budget.
+            spill (:obj:`str`, optional): Path of the spill file,
+                overwritten.
+            headroom (:obj:`float`, optional): Fraction of `budget`
+                freed by an eviction. Defaults to 0.1.
+            recent (:obj:`int`, optional): Number of protected entries.
+                Defaults to 64.
+
+        """
+        self.budget = budget
+        self.headroom = headroom
+        self.recent = recent
+        self.bytes = 0
+        self.evictions = 0
+        self.evicted_imported = 0
+        self.evicted_learned = 0
+        self.spilled = 0
+        self.fetched = 0
+
+        # Bytes of a key and its dict entries, measured on the first key
+        # as all observations of an actor have the same shape.
+        self._key_bytes = None
+        self._rows = {}
+        self._visits = {}
+        self._visited = {}
+        self._tick = 0
+
+        self.spill = spill
+        self._shelf = shelve.open(spill, 'n') if spill is not None else None
+        # Keys fetched back from the shelf. Their rows stay in it, stale,
+        # as deleting from some `dbm` backends rewrites their index.
+        self._fetched = set()
+        # Guards the shelf, which the checkpoint thread of `ImpExp` reads
+        # through `copy`.
+        self._lock = threading.Lock()
+
+    def _entry_bytes(self, key, q):
+        if self._key_bytes is None:
+            self._key_bytes = _DICT_BYTES + _sizeof(key)
+        # Read-only rows are imported by `ImpExp` and shared, only the rows
+        # copied by `Actor` on their first update are owned by the store.
+        return self._key_bytes + (sys.getsizeof(q) if q.flags.writeable else 0)
+
+    def _visit(self, key):
+        self._visits[key] += 1
+        self._visited[key] = self._tick
+        self._tick += 1
+
+    def _fetch(self, key):
+        if self._shelf is None:
+            return None
+        with self._lock:
+            q = self._shelf.get(repr(key))
+        if q is not None:
+            self.fetched += 1
+            self._fetched.add(key)
+            self._insert(key, q)
+        return q
+
+    def _insert(self, key, q):
+        self._rows[key] = q
+        self._visits[key] = 0
+        self._visited[key] = self._tick
+        self._tick += 1
+        self.bytes += self._entry_bytes(key, q)
+        if self.bytes > self.budget:
+            self._evict()
+
+    def _evict(self):
+        protected = self._tick - self.recent
+        target = self.budget * (1 - self.headroom)
+
+        def priority(key):
+            return self._rows[key].flags.writeable, self._visits[key], self._visited[key]
+
+        candidates = [key for key, tick in self._visited.items() if tick < protected]
+        victims = []
+        freed = 0
+        for key in sorted(candidates, key=priority):
+            if self.bytes - freed <= target:
+                break
+            victims.append(key)
+            freed += self._entry_bytes(key, self._rows[key])
+
+        # Spilled rows are written before they are dropped, so that `copy`
+        # always finds them in one place or the other.
+        if self._shelf is not None:
+            spilled = {repr(key): self._rows[key] for key in victims if self._rows[key].flags.writeable}
+            with self._lock:
+                self._shelf.update(spilled)
+            self.spilled += len(spilled)
+
+        for key in victims:
+            q = self._rows.pop(key)
+            del self._visits[key]
+            del self._visited[key]
+            self._fetched.discard(key)
+            if q.flags.writeable:
+                self.evicted_learned += 1
+            else:
+                self.evicted_imported += 1
+
+        self.bytes -= freed
+        for key in self._visits:
+            self._visits[key] //= 2
+        self.evictions += 1
+
+    def get(self, key, default=None):
+        q = self._rows.get(key)
+        if q is None:
+            q = self._fetch(key)
+            if q is None:
+                return default
+        # `_visit`, inlined as this is the hot path.
+        self._visits[key] += 1
+        self._visited[key] = self._tick
+        self._tick += 1
+        return q
+
+    def __getitem__(self, key):
+        q = self.get(key)
+        if q is None:
+            raise KeyError(key)
+        return q
+
+    def __setitem__(self, key, q):
+        old = self._rows.get(key)
+        if old is None and self._fetch(key) is None:
+            self._insert(key, q)
+            return
+
+        old = self._rows[key]
+        self._rows[key] = q
+        self.bytes += self._entry_bytes(key, q) - self._entry_bytes(key, old)
+        if self.bytes > self.budget:
+            self._evict()
+
+    def setdefault(self, key, q):
+        existing = self.get(key)
+        if existing is not None:
+            return existing
+        self._insert(key, q)
+        self._visit(key)
+        return q
+
+    def __contains__(self, key):
+        if key in self._rows:
+            return True
+        if self._shelf is None:
+            return False
+        with self._lock:
+            return repr(key) in self._shelf
+
+    def __len__(self):
+        if self._shelf is None:
+            return len(self._rows)
+        with self._lock:
+            return len(self._rows) + len(self._shelf) - len(self._fetched)
+
+    def keys(self):
+        return self.copy().keys()
+
+    def items(self):
+        return self.copy().items()
+
+    def copy(self):
+        """All q-values as a `dict`, including the spilled ones."""
+        rows = self._rows.copy()
+        if self._shelf is not None:
+            with self._lock:
+                spilled = {key: self._shelf[key] for key in self._shelf.keys()}
+            for key, q in spilled.items():
+                rows.setdefault(ast.literal_eval(key), q)
+        return rows
+
+    def stats(self):
+        """Memory statistics of the store.
+
+        Returns:
+            :obj:`dict`: `bytes` estimated and `budget`, the in-memory
+            `entries` of which `learned` are updated ones, the `spilled`
+            entries on disk, and cumulative `evictions` runs, evicted
+            `evicted_imported` and `evicted_learned` entries, and
+            `fetched` entries read back from the spill file.
+
+        """
+        if self._shelf is not None:
+            with self._lock:
+                on_disk = len(self._shelf) - len(self._fetched)
+        else:
+            on_disk = 0
+        return {
+            'bytes': self.bytes,
+            'budget': self.budget,
+            'entries': len(self._rows),
+            'learned': sum(q.flags.writeable for q in self._rows.values()),
+            'spilled': on_disk,
+            'evictions': self.evictions,
+            'evicted_imported': self.evicted_imported,
+            'evicted_learned': self.evicted_learned,
+            'fetched': self.fetched
+        }
+
+    def close(self):
+        if self._shelf is not None:
+            with self._lock:
+                self._shelf.close()
+            self._shelf = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_rows'] = self.copy()
+        state['_visits'] = dict.fromkeys(state['_rows'], 0)
+        state['_visited'] = dict.fromkeys(state['_rows'], 0)
+        state['_fetched'] = set()
+        state['spill'] = None
+        del state['_shelf'], state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shelf = None
+        self._lock = threading.Lock()
+        self.bytes = sum(self._entry_bytes(key, q) for key, q in self._rows.items())
@@ -8,7 +8,18 @@ class Environment:
     def observation(self, actor):
         raise NotImplementedError
 
-    def copy(self):
+    def permutation(self, actor):
+        """Permutation of the actions of `actor` in its observation, `None`
+        when they are not permuted.
+
+        Environments that map symmetric states to one observation
+        return the permutation (an involution) that takes the actions of
+        the state to those of the observation. `Actor` applies it to the
+        q-values it reads and the actions it updates.
+        """
+        return None
+
+    def copy(self, out=None):
         raise NotImplementedError
 
     def get_actors(self):
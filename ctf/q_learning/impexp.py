@@ -1,24 +1,283 @@
+import atexit
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
 import numpy as np
 
+from ctf.q_learning.journal import Journal
+from ctf.q_learning.mapped import MappedQValues
+
 
 class ImpExp:
-    def __init__(self, input_file=None, output_file=None, initial_q_values=None, transformation=None):
+    def __init__(self, input_file=None, output_file=None, initial_q_values=None, transformation=None,
+                 save_every=1, save_interval=None, cache_size=65536, journal=None):
+        """Imports pretrained q-values and checkpoints learned ones.
+
+        Checkpoints are written by a background thread, so the learning
+        loop never waits on disk. A checkpoint is requested every
+        `save_every` updates and/or every `save_interval` seconds, and a
+        final one is written by `close` (also registered with `atexit`).
+        Requests made while a write is in progress are coalesced into a
+        single write of the latest table. If a write fails, the writer
+        thread stops and the exception is raised by the next call to
+        `export_q_values`, `checkpoint` or `close`.
+
+        `input_file` is either a pickled `.npy` table, a directory
+        written by `save_mapped`, which is memory-mapped and read lazily,
+        or the directory of a `Journal`.
+
+        With `journal`, every update is also appended to a `Journal`,
+        written as it fills its buffer and on `close`. Every actor
+        exporting to this `ImpExp` gets its own journal, in the
+        subdirectory of `journal` named after the actor; such a
+        subdirectory can be imported as `input_file`.
+
+        Imported rows are read-only and shared (a single zero row stands
+        for every unknown state); `Actor` copies a row on its first
+        update. Imports by key are memoized in an LRU cache of
+        `cache_size` entries, counted by `cache_hits` and `cache_misses`.
+
+        Args:
+            save_every (:obj:`int`, optional): Number of updates between
+                checkpoints, `None` to disable. Defaults to 1.
+            save_interval (:obj:`float`, optional): Seconds between
+                checkpoints, `None` to disable. Defaults to `None`.
+            cache_size (:obj:`int`, optional): Maximum number of memoized
+                imports. Defaults to 65536.
+            journal (:obj:`str`, optional): Directory of the journals.
+
+        """
         self.output_file = output_file
         self.transformation = transformation
+        self.save_every = save_every
+        self.save_interval = save_interval
 
-        if input_file is not None:
+        if input_file is not None and os.path.isfile(os.path.join(input_file, 'CURRENT')):
+            self.initial_q_values = Journal.load(input_file)
+        elif input_file is not None and os.path.isdir(input_file):
+            self.initial_q_values = MappedQValues(input_file)
+        elif input_file is not None:
             self.initial_q_values = np.load(input_file, allow_pickle=True)[()]
         else:
             self.initial_q_values = initial_q_values
 
-    def export_q_values(self, actor):
-        if self.output_file is not None:
-            np.save(self.output_file, actor.q_values)
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = OrderedDict()
+        self._zeros = {}
+
+        self._actor = None
+        self._updates = 0
+        self._saved_updates = 0
+        self._requested = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = None
+        # Exception that stopped the writer thread, raised by `_check`.
+        self._error = None
+
+        self.journal = journal
+        # Journals by actor name.
+        self._journals = {}
+
+    def _record(self, actor, key, q, action=None):
+        journal = self._journals.get(actor.name)
+        if journal is None:
+            if not self._journals:
+                atexit.register(self.close)
+            journal = Journal(os.path.join(self.journal, actor.name), actor.number_actions)
+            self._journals[actor.name] = journal
+
+        if action is None:
+            journal.append_row(key, q)
+        else:
+            journal.append(key, action, q[action])
+
+    def export_q_values(self, actor, key=None, q=None, action=None):
+        """Counts an update of `actor` towards the next checkpoint.
+
+        With a `journal`, `key` and its row `q` are also recorded in the
+        journal of `actor`: the q-value of `action`, or the whole row if
+        `action` is `None`.
+
+        Raises:
+            ValueError: If there is a `journal` but no `key`.
+
+        """
+        if self.journal is not None:
+            if key is None:
+                raise ValueError('exports to a journal need the updated key and row')
+            self._record(actor, key, q, action)
+        self._count(actor)
+
+    def export_rows(self, actor, slots):
+        """Counts a batched update of the `QTable` of `actor` towards the
+        next checkpoint, recording its rows at `slots` with a `journal`."""
+        if self.journal is not None:
+            table = actor.q_values
+            for slot in np.unique(slots).tolist():
+                self._record(actor, table.key(table.rows[slot]), table.values[slot])
+        self._count(actor)
+
+    def _count(self, actor):
+        if self.output_file is None:
+            return
+
+        self._check()
+        self._actor = actor
+        self._updates += 1
+
+        if self._thread is None:
+            self._start()
+
+        if self.save_every is not None and self._updates % self.save_every == 0:
+            with self._condition:
+                self._requested = True
+                self._condition.notify()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_actor=None, _updates=0, _saved_updates=0, _requested=False, _closed=False,
+                     _condition=None, _thread=None, _error=None, _cache=OrderedDict(),
+                     _journals={})
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._condition = threading.Condition()
+
+    def checkpoint(self):
+        """Requests a checkpoint of the latest table and returns at once.
+
+        Buffered journal records are written before returning.
+        """
+        for journal in self._journals.values():
+            journal.flush()
+
+        if self._thread is None:
+            return
+
+        self._check()
+        with self._condition:
+            self._requested = True
+            self._condition.notify()
+
+    def _check(self):
+        """Raises the exception that stopped the writer thread, if any; the
+        next request starts a new thread."""
+        if self._error is None:
+            return
+
+        error, self._error = self._error, None
+        self._thread.join()
+        self._thread = None
+        atexit.unregister(self.close)
+        raise error
+
+    def close(self):
+        """Writes a final checkpoint, stops the writer thread and closes
+        the journal.
+
+        Raises the exception of a failed write, like `export_q_values`.
+        """
+        for journal in self._journals.values():
+            journal.close()
+        self._journals = {}
+
+        if self._thread is not None:
+            with self._condition:
+                self._closed = True
+                self._condition.notify()
+            self._thread.join()
+            self._closed = False
+
+        atexit.unregister(self.close)
+        if self._thread is not None:
+            self._check()
+            self._thread = None
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._write_loop, name='ImpExp-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._requested or self._closed, timeout=self.save_interval)
+                self._requested = False
+                closed = self._closed
+
+            updates = self._updates
+            if updates != self._saved_updates:
+                # dict.copy holds the GIL, so the snapshot is consistent
+                # with respect to insertions made by the learning thread.
+                try:
+                    self._write(self._actor.q_values.copy())
+                except Exception as error:
+                    self._error = error
+                    return
+                self._saved_updates = updates
+
+            if closed:
+                return
+
+    def _write(self, q_values):
+        if isinstance(q_values, dict):
+            # Shared read-only rows would be pickled once and come back as
+            # one writable array aliased by every key that held them.
+            q_values = {key: q if q.flags.writeable else q.copy() for key, q in q_values.items()}
+        else:
+            # Other stores, such as `QTable`, are pickled whole through their
+            # `__getstate__`; `np.save` would iterate them as a sequence.
+            table = np.empty((), dtype=object)
+            table[()] = q_values
+            q_values = table
+
+        path = os.fspath(self.output_file)
+        if not path.endswith('.npy'):
+            path += '.npy'
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, q_values)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _zero_row(self, number_actions):
+        q = self._zeros.get(number_actions)
+        if q is None:
+            q = self._zeros[number_actions] = np.zeros(number_actions, dtype=np.float64)
+            q.flags.writeable = False
+        return q
 
     def get_q_values(self, actor, key):
         if self.initial_q_values is None:
-            return np.zeros(actor.number_actions).astype(np.float64)
+            return self._zero_row(actor.number_actions)
+
+        q = self._cache.get(key)
+        if q is not None:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+            return q
 
-        key2 = self.transformation(key)
+        self.cache_misses += 1
+        key2 = self.transformation(key) if self.transformation is not None else key
+
+        q = self.initial_q_values.get(key2)
+        if q is None:
+            q = self._zero_row(actor.number_actions)
+        else:
+            q = q.view()
+            q.flags.writeable = False
 
-        return self.initial_q_values.get(key2, np.zeros(actor.number_actions).astype(np.float64))
+        if self.cache_size:
+            self._cache[key] = q
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return q
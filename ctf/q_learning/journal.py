@@ -0,0 +1,246 @@
+import json
+import os
+import shutil
+import struct
+
+import numpy as np
+
+from ctf.q_learning.mapped import MappedQValues, _flatten, _pack_rows, _save_arrays
+
+# Magic, allies, enemies and number of actions, at the start of every log.
+_HEADER = struct.Struct('<4sHHH')
+_MAGIC = b'CTFJ'
+
+
+def _record_dtype(allies, enemies):
+    return np.dtype([('key', '<i2', (2 * (1 + allies + enemies),)), ('action', 'u1'), ('value', '<f8')])
+
+
+class Journal:
+    def __init__(self, path, number_actions=5, buffer_size=4096, compact_ratio=1.0):
+        """Q-values persisted as a base snapshot and a log of changes.
+
+        The directory `path` holds a generation of the table: the base
+        `base-N`, in the format of `save_mapped`, and `log-N.bin`, an
+        append-only log of fixed-size `(key, action, value)` records with
+        keys flattened to `y, x` coordinates. `CURRENT` names the
+        generation and is replaced atomically, so a crash leaves either
+        the old generation or the new one.
+
+        Records are buffered and appended `buffer_size` at a time, so
+        the cost of persisting is proportional to the updates. Once the
+        log holds more than `compact_ratio` times as many records as the
+        base has keys, `compact` folds it into a new base.
+
+        Opening an existing journal drops a partially written record at
+        the end of the log, and appends after the rest; `load` replays
+        the log over the base.
+
+        Args:
+            path (:obj:`str`): Directory of the journal, created if
+                missing.
+            number_actions (:obj:`int`, optional): Length of the rows.
+                Defaults to 5.
+            buffer_size (:obj:`int`, optional): Records per write.
+                Defaults to 4096.
+            compact_ratio (:obj:`float`, optional): Log to base size
+                ratio that triggers `compact`, `None` to never compact.
+                Defaults to 1.0.
+
+        """
+        self.path = path
+        self.number_actions = number_actions
+        self.buffer_size = buffer_size
+        self.compact_ratio = compact_ratio
+        os.makedirs(path, exist_ok=True)
+
+        self.generation, self.base_entries = self._read_current(path)
+        self.records = 0
+        self.allies = self.enemies = None
+        self._file = None
+        self._pending = []
+
+        log = self._log_path(path, self.generation)
+        if os.path.exists(log) and os.path.getsize(log) < _HEADER.size:
+            os.remove(log)
+        if os.path.exists(log):
+            header, dtype = self._read_header(log)
+            _, self.allies, self.enemies, self.number_actions = header
+            self.records = (os.path.getsize(log) - _HEADER.size) // dtype.itemsize
+            os.truncate(log, _HEADER.size + self.records * dtype.itemsize)
+
+    @staticmethod
+    def _base_path(path, generation):
+        return os.path.join(path, f'base-{generation}')
+
+    @staticmethod
+    def _log_path(path, generation):
+        return os.path.join(path, f'log-{generation}.bin')
+
+    @staticmethod
+    def _read_current(path):
+        try:
+            with open(os.path.join(path, 'CURRENT')) as f:
+                current = json.load(f)
+        except FileNotFoundError:
+            return 0, 0
+        return current['generation'], current['entries']
+
+    @staticmethod
+    def _read_header(log):
+        with open(log, 'rb') as f:
+            header = _HEADER.unpack(f.read(_HEADER.size))
+        if header[0] != _MAGIC:
+            raise ValueError(f'{log} is not a journal log')
+        return header, _record_dtype(header[1], header[2])
+
+    def _write_current(self, generation, entries):
+        current = os.path.join(self.path, 'CURRENT')
+        with open(current + '.tmp', 'w') as f:
+            json.dump({'generation': generation, 'entries': entries}, f)
+        os.replace(current + '.tmp', current)
+
+    def _flatten(self, key):
+        if self.allies is None:
+            self.allies, self.enemies = len(key[1]), len(key[2])
+        return _flatten(key)
+
+    def _open(self):
+        log = self._log_path(self.path, self.generation)
+        self._file = open(log, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(_MAGIC, self.allies, self.enemies, self.number_actions))
+
+    def append(self, key, action, value):
+        """Records that the q-value of `action` in `key` is `value`."""
+        self._pending.append((self._flatten(key), action, value))
+        if len(self._pending) >= self.buffer_size:
+            self.flush()
+
+    def append_row(self, key, q):
+        """Records every q-value of `key`."""
+        key = self._flatten(key)
+        self._pending.extend((key, action, value) for action, value in enumerate(q.tolist()))
+        if len(self._pending) >= self.buffer_size:
+            self.flush()
+
+    def _write_pending(self):
+        if self._file is None:
+            self._open()
+
+        keys, actions, values = zip(*self._pending)
+        records = np.empty(len(self._pending), dtype=_record_dtype(self.allies, self.enemies))
+        records['key'] = keys
+        records['action'] = actions
+        records['value'] = values
+        self._file.write(records.tobytes())
+        self.records += len(self._pending)
+        self._pending = []
+
+    def flush(self):
+        """Appends the buffered records to the log, compacting it if it
+        has grown past `compact_ratio`."""
+        if not self._pending:
+            return
+
+        self._write_pending()
+        self._file.flush()
+
+        if self.compact_ratio is not None and self.records > self.compact_ratio * max(self.base_entries,
+                                                                                    self.buffer_size):
+            self.compact()
+
+    @classmethod
+    def _merge(cls, path):
+        """Replays the log of the journal in `path` over its base.
+
+        Returns:
+            :obj:`tuple`: Flattened keys `(n, coordinates)`, their rows
+            `(n, number_actions)`, and the numbers of allies and enemies,
+            or `None` for an empty journal.
+
+        """
+        generation, entries = cls._read_current(path)
+        coordinates = values = shape = None
+        if entries:
+            base = MappedQValues(cls._base_path(path, generation))
+            coordinates, values = base.coordinates(), np.array(base.values)
+            shape = (base.allies, base.enemies)
+
+        log = cls._log_path(path, generation)
+        if os.path.exists(log) and os.path.getsize(log) >= _HEADER.size:
+            header, dtype = cls._read_header(log)
+            _, allies, enemies, number_actions = header
+            count = (os.path.getsize(log) - _HEADER.size) // dtype.itemsize
+            records = np.fromfile(log, dtype=dtype, count=count, offset=_HEADER.size)
+        else:
+            records = ()
+        if not len(records):
+            return None if coordinates is None else (coordinates, values) + shape
+
+        if coordinates is None:
+            coordinates = np.empty((0, records['key'].shape[1]), dtype=np.int64)
+            values = np.empty((0, number_actions))
+        coordinates = np.concatenate([coordinates, records['key']])
+        _, first, inverse = np.unique(_pack_rows(coordinates, int(coordinates.max()) + 1), return_index=True,
+                                      return_inverse=True)
+        keys = coordinates[first]
+        merged = np.zeros((len(keys), number_actions))
+        merged[inverse[:len(values)]] = values
+
+        # Only the last record of every key and action counts.
+        cells = inverse[len(values):] * number_actions + records['action']
+        _, last = np.unique(cells[::-1], return_index=True)
+        last = len(cells) - 1 - last
+        merged.flat[cells[last]] = records['value'][last]
+        return keys, merged, allies, enemies
+
+    @classmethod
+    def load(cls, path):
+        """Reads the q-values of the journal in `path`.
+
+        Returns:
+            :obj:`dict`: Mapping of keys to writable rows.
+
+        """
+        merged = cls._merge(path)
+        if merged is None:
+            return {}
+
+        coordinates, values, allies, _ = merged
+        q_values = {}
+        for coordinates, q in zip(coordinates.tolist(), values):
+            points = list(zip(coordinates[0::2], coordinates[1::2]))
+            q_values[points[0], tuple(points[1:1 + allies]), tuple(points[1 + allies:])] = q
+        return q_values
+
+    def compact(self):
+        """Folds the log into a new base and starts an empty log."""
+        if self._pending:
+            self._write_pending()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        merged = self._merge(self.path)
+        generation = self.generation + 1
+        entries = 0
+        if merged is not None:
+            _save_arrays(self._base_path(self.path, generation), *merged)
+            entries = len(merged[0])
+        self._write_current(generation, entries)
+
+        shutil.rmtree(self._base_path(self.path, self.generation), ignore_errors=True)
+        old_log = self._log_path(self.path, self.generation)
+        if os.path.exists(old_log):
+            os.remove(old_log)
+
+        self.generation = generation
+        self.base_entries = entries
+        self.records = 0
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
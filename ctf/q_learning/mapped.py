@@ -0,0 +1,141 @@
+import itertools
+import json
+import os
+
+import numpy as np
+
+
+def _flatten(key):
+    position, allies, enemies = key
+    return [*position, *itertools.chain.from_iterable(allies), *itertools.chain.from_iterable(enemies)]
+
+
+def _pack(coordinates, radix):
+    packed = 0
+    for coordinate in coordinates:
+        packed = packed * radix + coordinate
+    return packed
+
+
+def save_mapped(path, q_values):
+    """Writes `q_values` in the format read by `MappedQValues`.
+
+    The directory `path` receives `keys.npy`, the sorted packed keys,
+    `values.npy`, the matching rows, and `meta.json`. All keys must have
+    the same number of allies and enemies.
+
+    Args:
+        path (:obj:`str`): Directory to write, created if missing.
+        q_values (:obj:`dict`): Mapping of observations to q-values, such
+            as `Actor.q_values`.
+
+    Raises:
+        ValueError: If the keys differ in shape or do not fit in 64 bits.
+
+    """
+    keys = list(q_values.keys())
+    if not keys:
+        raise ValueError('cannot save an empty table')
+
+    _, allies, enemies = keys[0]
+    shape = (len(allies), len(enemies))
+    if any((len(key[1]), len(key[2])) != shape for key in keys):
+        raise ValueError('all keys must have the same number of allies and enemies')
+
+    coordinates = np.array([_flatten(key) for key in keys], dtype=np.int64)
+    _save_arrays(path, coordinates, np.stack([q_values[key] for key in keys]), *shape)
+
+
+def _pack_rows(coordinates, radix):
+    """Packs rows of `coordinates` below `radix` into `int64` keys."""
+    if radix ** coordinates.shape[1] > np.iinfo(np.int64).max:
+        raise ValueError('keys do not fit in 64 bits')
+
+    packed = np.zeros(len(coordinates), dtype=np.int64)
+    for column in coordinates.T.astype(np.int64):
+        packed = packed * radix + column
+    return packed
+
+
+def _save_arrays(path, coordinates, values, allies, enemies):
+    """`save_mapped` of keys flattened by `_flatten` into the rows of
+    `coordinates`, and their rows `values`."""
+    radix = int(coordinates.max()) + 1
+    packed = _pack_rows(coordinates, radix)
+    order = np.argsort(packed)
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'keys.npy'), packed[order])
+    np.save(os.path.join(path, 'values.npy'), values[order])
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'radix': radix, 'allies': allies, 'enemies': enemies}, f)
+
+
+def convert(input_file, path):
+    """Converts a pickled `.npy` table, as written by `ImpExp`, with
+    `save_mapped`."""
+    save_mapped(path, np.load(input_file, allow_pickle=True)[()])
+
+
+class MappedQValues:
+    def __init__(self, path):
+        """Read-only q-values memory-mapped from a `save_mapped` directory.
+
+        Nothing is read up front: lookups binary search the memory-mapped
+        keys and return read-only views of the memory-mapped rows, so
+        processes loading the same table share its pages.
+
+        """
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.radix = meta['radix']
+        self.allies = meta['allies']
+        self.enemies = meta['enemies']
+        self.keys = np.load(os.path.join(path, 'keys.npy'), mmap_mode='r')
+        self.values = np.load(os.path.join(path, 'values.npy'), mmap_mode='r')
+
+    def _find(self, key):
+        if len(key[1]) != self.allies or len(key[2]) != self.enemies:
+            return None
+
+        coordinates = _flatten(key)
+        if max(coordinates) >= self.radix or min(coordinates) < 0:
+            return None
+
+        packed = _pack(coordinates, self.radix)
+        index = int(np.searchsorted(self.keys, packed))
+        if index < len(self.keys) and self.keys[index] == packed:
+            return index
+        return None
+
+    def get(self, key, default=None):
+        index = self._find(key)
+        if index is None:
+            return default
+        return self.values[index]
+
+    def __getitem__(self, key):
+        index = self._find(key)
+        if index is None:
+            raise KeyError(key)
+        return self.values[index]
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def coordinates(self):
+        """Keys unpacked to the coordinates of `_flatten`, one row each."""
+        packed = np.array(self.keys)
+        coordinates = np.empty((len(packed), 2 * (1 + self.allies + self.enemies)), dtype=np.int64)
+        for i in reversed(range(coordinates.shape[1])):
+            packed, coordinates[:, i] = np.divmod(packed, self.radix)
+        return coordinates
+
+    def items(self):
+        """Yields every key, unpacked, with its read-only row."""
+        for coordinates, q in zip(self.coordinates().tolist(), np.asarray(self.values)):
+            points = list(zip(coordinates[0::2], coordinates[1::2]))
+            yield (points[0], tuple(points[1:1 + self.allies]), tuple(points[1 + self.allies:])), q
@@ -1,47 +1,134 @@
 import pickle
+import time
 
 import numpy as np
 
 
 class Model:
-    def __init__(self, initial, alpha=0.3, gamma=0.9, eps=0.15):
+    def __init__(self, initial, alpha=0.3, gamma=0.9, eps=0.15, seed=None, block=4096, profiler=None, buffer=None,
+                 replay=None):
         self.state = initial
+        # Spare state that the next state is copied into, swapped with
+        # `state` every step so that stepping allocates no new state.
+        self.next_state = initial.copy()
         self.alpha = alpha
         self.gamma = gamma
         self.eps = eps
+        # Every action takes a pair of uniforms, drawn `block` pairs at a
+        # time, so runs with the same seed are identical.
+        self.rng = np.random.default_rng(seed)
+        self.block = block
+        self._uniforms = []
+        self._drawn = 0
+        # Optional `Profiler`, timing every phase of `run`.
+        self.profiler = profiler
+        # Optional `TransitionBuffer`, receiving every transition.
+        self.buffer = buffer
+        # Optional `Replay`, learning from minibatches instead of every
+        # transition as it happens.
+        self.replay = replay
+
+    def _draw(self):
+        if self._drawn == len(self._uniforms):
+            self._uniforms = self.rng.random((self.block, 2)).tolist()
+            self._drawn = 0
+        self._drawn += 1
+        return self._uniforms[self._drawn - 1]
 
     def e_greedy(self, actor):
         q = actor.get_q_values(self.state)
-        if np.random.uniform() < self.eps:
-            return np.random.randint(len(q))
+        explore, pick = self._draw()
+        if explore < self.eps:
+            return int(pick * len(q))
 
-        policy = np.isclose(q, q.min())
-        policy = policy / policy.sum()
-        return np.random.choice(len(q), p=policy)
+        # Uniform among the actions within the tolerance of `np.isclose`
+        # of the minimum.
+        q = q.tolist()
+        best = min(q)
+        tolerance = 1e-08 + 1e-05 * abs(best)
+        ties = [action for action, value in enumerate(q) if value - best <= tolerance]
+        return ties[int(pick * len(ties))]
 
     def q_learning(self, actor, action, cost, next_state, next_actor):
         q_values = actor.get_q_values(self.state)
         next_q_values = next_actor.get_q_values(next_state)
         return q_values[action] + self.alpha * (cost + self.gamma * next_q_values.min() - q_values[action])
 
+    def _transition(self, i, actor, action, cost, next_state, next_actor):
+        """Transition of actor `i` given to `buffer` and `replay`, with
+        `action` mapped into the frame of its observation, see
+        `Environment.permutation`."""
+        permutation = self.state.permutation(actor)
+        if permutation is not None:
+            action = permutation[action]
+        return i, self.state.observation(actor), action, cost, next_state.observation(next_actor)
+
+    def _lap(self, phase, start):
+        """Adds the time since `start` to `phase` of `profiler`, returning
+        the end of the lap."""
+        end = time.perf_counter()
+        self.profiler.times[phase] += end - start
+        return end
+
     def run(self):
+        # With a `profiler`, the phases are timed as laps from `start`.
+        profiler = self.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+
         actors = self.state.get_actors()
         actions = np.array([self.e_greedy(actor) for actor in actors])
+        if profiler is not None:
+            start = self._lap('select', start)
 
-        next_state = self.state.copy()
+        next_state = self.state.copy(self.next_state)
         next_actors = next_state.get_actors()
+        if profiler is not None:
+            start = self._lap('copy', start)
+
         next_state.apply_actions(list(zip(next_actors, actions)))
+        if profiler is not None:
+            start = self._lap('apply_actions', start)
+
         next_state.update_before()
+        if profiler is not None:
+            start = self._lap('update_before', start)
+
+        for i, (actor, action, next_actor) in enumerate(zip(actors, actions, next_actors)):
+            cost = self.state.cost(actor, action)
+            if self.replay is not None:
+                # Transitions are learned in minibatches by `replay.step`.
+                transition = self._transition(i, actor, action, cost, next_state, next_actor)
+                self.replay.append(*transition)
+                if self.buffer is not None:
+                    self.buffer.append(*transition)
+                if profiler is not None:
+                    start = self._lap('q_update', start)
+                continue
+
+            exported = actor.update_q_values(
+                self.state, action, self.q_learning(actor, action, cost, next_state, next_actor), export=False
+            )
+            if self.buffer is not None:
+                self.buffer.append(*self._transition(i, actor, action, cost, next_state, next_actor))
+            if profiler is not None:
+                start = self._lap('q_update', start)
 
-        for actor, action, next_actor in zip(actors, actions, next_actors):
-            actor.update_q_values(self.state, action, self.q_learning(
-                actor,
-                action,
-                self.state.cost(actor, action),
-                next_state,
-                next_actor
-            ))
+            actor.impexp.export_q_values(actor, *exported)
+            if profiler is not None:
+                start = self._lap('export', start)
 
+        self.next_state = self.state
         self.state = next_state
 
         self.state.update_after()
+        if profiler is not None:
+            start = self._lap('update_after', start)
+
+        if self.replay is not None:
+            self.replay.step(self)
+            if profiler is not None:
+                self._lap('q_update', start)
+
+        if profiler is not None:
+            profiler.step(self)
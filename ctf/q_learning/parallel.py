@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import queue
+import time
+
+import numpy as np
+
+from ctf.q_learning.model import Model
+from ctf.q_learning.qtable import QTable
+
+
+def _work(make_game, tables, locks, steps, worker, seed, model_kwargs, results):
+    np.random.seed(seed)
+
+    game = make_game()
+    attached = []
+    for actor, (name, args, lock), table_locks in zip(game.get_actors(), tables, locks):
+        actor.q_values = QTable.attach(name, *args, lock=lock)
+        actor.q_values.locks = table_locks
+        attached.append(actor.q_values)
+
+    model = Model(game, seed=seed, **model_kwargs)
+    start = time.perf_counter()
+    for _ in range(steps):
+        model.run()
+    seconds = time.perf_counter() - start
+
+    del game, model
+    for table in attached:
+        table.close()
+
+    results.put({
+        'worker': worker,
+        'seed': seed,
+        'steps': steps,
+        'seconds': seconds,
+        'steps_per_second': steps / seconds if seconds > 0 else float('inf')
+    })
+
+
+class ParallelTrainer:
+    def __init__(self, make_game, workers=None, seed=None, locks=0, dtype=np.float64, capacity=2 ** 20,
+                 **model_kwargs):
+        """Trains one shared set of q-values with several processes.
+
+        Every worker builds its own game with `make_game` and runs a
+        `Model` on it, while the q-values of each actor live in a shared
+        `QTable` of `capacity` states. Updates are lock-free unless
+        `locks` is positive, in which case each table gets that many
+        striped locks, taken by every update through `QTable.update`;
+        first visits always take the lock of the table.
+
+        Args:
+            make_game (:obj:`callable`): Picklable function returning a
+                new game, e.g. a `Ctf` after `new_game`. Actors are
+                matched to tables by their order in `get_actors`.
+            workers (:obj:`int`, optional): Number of processes. Defaults
+                to `os.cpu_count()`.
+            seed (:obj:`int`, optional): Seed from which the seed of
+                every worker is derived.
+            locks (:obj:`int`, optional): Striped locks per table.
+                Defaults to 0.
+            dtype (:obj:`numpy.dtype`, optional): Dtype of the tables.
+            capacity (:obj:`int`, optional): States each table can hold.
+                Defaults to 2 ** 20.
+
+        """
+        self.make_game = make_game
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.model_kwargs = model_kwargs
+        self.seeds = np.random.SeedSequence(seed)
+
+        game = make_game()
+        self.tables = []
+        self.locks = []
+        for actor in game.get_actors():
+            n_allies = len(game.units[actor.team]) - 1
+            n_enemies = len(game.units[1 - actor.team])
+            table = QTable(game.board.shape, n_allies, n_enemies, actor.number_actions, dtype).share(capacity)
+            self.tables.append(table)
+            self.locks.append(tuple(multiprocessing.Lock() for _ in range(locks)))
+
+    def run(self, steps):
+        """Runs `steps` steps in every worker.
+
+        Returns:
+            :obj:`dict`: Throughput of every worker under `workers`, and
+            the total `steps`, wall-clock `seconds` and `steps_per_second`.
+
+        """
+        tables = [
+            (
+                table.memory.name,
+                (table.shape, table.n_allies, table.n_enemies, table.number_actions, table.values.dtype,
+                 len(table.values)),
+                table.lock
+            )
+            for table in self.tables
+        ]
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=_work,
+                args=(self.make_game, tables, self.locks, steps, worker, int(sequence.generate_state(1)[0]),
+                      self.model_kwargs, results)
+            )
+            for worker, sequence in enumerate(self.seeds.spawn(self.workers))
+        ]
+
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        workers = []
+        while len(workers) < len(processes):
+            try:
+                workers.append(results.get(timeout=1))
+            except queue.Empty:
+                failed = [process.exitcode for process in processes if process.exitcode not in (None, 0)]
+                if failed:
+                    for process in processes:
+                        process.terminate()
+                    raise RuntimeError(f'{len(failed)} worker(s) failed with exit codes {failed}')
+        workers.sort(key=lambda result: result['worker'])
+        for process in processes:
+            process.join()
+        seconds = time.perf_counter() - start
+
+        return {
+            'workers': workers,
+            'steps': steps * self.workers,
+            'seconds': seconds,
+            'steps_per_second': steps * self.workers / seconds
+        }
+
+    def close(self):
+        """Moves the tables back to private memory and frees the shared blocks."""
+        for table in self.tables:
+            table.unshare()
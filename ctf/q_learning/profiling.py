@@ -0,0 +1,106 @@
+import csv
+import json
+
+PHASES = ('select', 'copy', 'apply_actions', 'update_before', 'q_update', 'export', 'update_after')
+
+
+class MemorySink:
+    """Keeps the rows of a `Profiler` in `rows`."""
+
+    def __init__(self):
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+
+    def close(self):
+        pass
+
+
+class CsvSink:
+    """Writes the rows of a `Profiler` to a CSV file, with a header."""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = None
+
+    def write(self, row):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(row))
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlSink:
+    """Writes the rows of a `Profiler` to a file, one JSON object per line."""
+
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def write(self, row):
+        self.file.write(json.dumps(row) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class Profiler:
+    def __init__(self, sink=None, every=1000):
+        """Phase timers and counters of a `Model`, given as its `profiler`.
+
+        `Model` adds the seconds spent in each of `PHASES` to `times`.
+        Every `every` steps a row is written to `sink` with the step, the
+        seconds of every phase since the previous row, and counters read
+        from the state: the number of states in the q-values of all
+        actors, their cumulative lookup misses, the score and the
+        captures.
+
+        Args:
+            sink (:obj:`MemorySink`, :obj:`CsvSink` or :obj:`JsonlSink`,
+                optional): Receives the rows. Defaults to a `MemorySink`.
+            every (:obj:`int`, optional): Steps between rows. Defaults to
+                1000.
+
+        """
+        self.sink = sink if sink is not None else MemorySink()
+        self.every = every
+        self.steps = 0
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.totals = dict.fromkeys(PHASES, 0.0)
+        # Model of the last step, whose remaining steps `close` flushes.
+        self._model = None
+        self._flushed = 0
+
+    def step(self, model):
+        self._model = model
+        self.steps += 1
+        if self.steps % self.every == 0:
+            self.flush(model)
+
+    def flush(self, model):
+        """Writes a row for the steps since the previous one."""
+        state = model.state
+        actors = state.get_actors()
+
+        row = {'step': self.steps}
+        for phase in PHASES:
+            row[phase] = self.times[phase]
+            self.totals[phase] += self.times[phase]
+            self.times[phase] = 0.0
+        row['states'] = sum(len(actor.q_values) for actor in actors)
+        row['misses'] = sum(actor.misses for actor in actors)
+        row['score_0'], row['score_1'] = (int(score) for score in state.score)
+        row['captures_0'], row['captures_1'] = (int(captures) for captures in state.captures)
+
+        self.sink.write(row)
+        self._flushed = self.steps
+
+    def close(self):
+        """Writes a row for the steps since the previous one, if any, and
+        closes the sink."""
+        if self._model is not None and self.steps != self._flushed:
+            self.flush(self._model)
+        self.sink.close()
@@ -0,0 +1,427 @@
+import bisect
+import contextlib
+import multiprocessing
+from math import comb
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Marks an empty bucket of the hash table of a shared `QTable`.
+_EMPTY = -1
+# Fibonacci hashing of packed indices into the buckets.
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK = (1 << 64) - 1
+
+
+def _buckets(capacity):
+    """Buckets of a shared table of `capacity` rows, a power of two at
+    most half full."""
+    return 1 << (2 * capacity - 1).bit_length()
+
+
+class QTable:
+    def __init__(self, shape, n_allies, n_enemies, number_actions=5, dtype=np.float64, capacity=1024):
+        """Sparse q-value store indexed by packed observations.
+
+        An observation `(position, allies, enemies)` is packed into a
+        single integer index: the own cell, followed by the rank of the
+        sorted ally cells and the rank of the sorted enemy cells as
+        multisets (combinatorial number system). Only visited states
+        take memory: their rows live in the contiguous
+        `(capacity, number_actions)` array `values`, in the order they
+        were first visited, with the packed index of every slot in
+        `rows`, and a `dict` maps packed indices to slots. `values`
+        doubles when it is full.
+
+        `QTable` implements the parts of the `dict` protocol used by
+        `Actor`, so it can be passed as `q_values` in place of a `dict`.
+        Batched callers pack observations with `indices` and look up
+        their slots in `values` with `slots`.
+
+        A table can be moved into shared memory with `share` and opened
+        from other processes with `attach`. A shared table has a fixed
+        capacity and maps packed indices to slots with an
+        open-addressing hash table in the same block. First visits take
+        `lock`, shared by every process, and publish the slot once its
+        row is written. Values are updated lock-free, unless `locks`
+        holds a sequence of locks: then `update` and whole-row writes
+        take the lock of their stripe (`index % len(locks)`).
+
+        Args:
+            shape (:obj:`tuple`): Dimensions of the board.
+            n_allies (:obj:`int`): Number of allies in an observation.
+            n_enemies (:obj:`int`): Number of enemies in an observation.
+            number_actions (:obj:`int`, optional): Defaults to 5.
+            dtype (:obj:`numpy.dtype`, optional): Defaults to `np.float64`,
+                `np.float32` halves the memory.
+            capacity (:obj:`int`, optional): Rows allocated up front.
+                Defaults to 1024.
+
+        Raises:
+            ValueError: If packed indices do not fit in 64 bits.
+
+        """
+        self.shape = tuple(shape)
+        self.n_allies = n_allies
+        self.n_enemies = n_enemies
+        self.number_actions = number_actions
+
+        cells = self.shape[0] * self.shape[1]
+        k = max(n_allies, n_enemies)
+        self._binomials = [[comb(n, i) for n in range(cells + k)] for i in range(k + 1)]
+        self._binomial_array = np.array(self._binomials, dtype=np.int64)
+        self._ally_states = comb(cells + n_allies - 1, n_allies)
+        self._enemy_states = comb(cells + n_enemies - 1, n_enemies)
+
+        # Offsets of the three parts of a key, memoized per sub-tuple so a
+        # lookup costs three small dict hits instead of a Python-level rank.
+        stride = self._ally_states * self._enemy_states
+        if cells * stride > np.iinfo(np.int64).max:
+            raise ValueError('packed observations do not fit in 64 bits')
+        self._position_offsets = {
+            (y, x): (y * self.shape[1] + x) * stride
+            for y in range(self.shape[0]) for x in range(self.shape[1])
+        }
+        self._ally_offsets = {}
+        self._enemy_offsets = {}
+
+        self.locks = ()
+        self.lock = None
+        self.memory = None
+        # Slots of packed indices. For a shared table, a cache of the
+        # hash table in the block, since slots never move there.
+        self._slots = {}
+        self._allocate(
+            np.zeros((max(capacity, 1), number_actions), dtype=dtype),
+            np.zeros(max(capacity, 1), dtype=np.int64),
+            np.zeros(1, dtype=np.int64)
+        )
+
+    def _allocate(self, values, rows, count, buckets=None):
+        self.values = values
+        self.rows = rows
+        self._count = count
+        self._buckets = buckets
+        if buckets is not None:
+            self._shift = 65 - len(buckets).bit_length()
+
+    def _grow(self):
+        values = np.zeros((2 * len(self.values), self.number_actions), dtype=self.values.dtype)
+        rows = np.zeros(2 * len(self.rows), dtype=np.int64)
+        values[:len(self.values)] = self.values
+        rows[:len(self.rows)] = self.rows
+        self._allocate(values, rows, self._count)
+
+    def _probe(self, index):
+        """Bucket of `index` in the hash table of a shared table, and its
+        slot, `None` if it has none yet."""
+        buckets = self._buckets
+        mask = len(buckets) - 1
+        bucket = ((index * _GOLDEN) & _MASK) >> self._shift
+        while True:
+            slot = int(buckets[bucket])
+            if slot == _EMPTY:
+                return bucket, None
+            if self.rows[slot] == index:
+                return bucket, slot
+            bucket = (bucket + 1) & mask
+
+    def _slot(self, index):
+        slot = self._slots.get(index)
+        if slot is None and self._buckets is not None:
+            slot = self._probe(index)[1]
+            if slot is not None:
+                self._slots[index] = slot
+        return slot
+
+    def _insert(self, index, q):
+        """Slot of `index`, given the row `q` if it is not visited yet."""
+        if self._buckets is None:
+            slot = int(self._count[0])
+            if slot == len(self.values):
+                self._grow()
+            self.values[slot] = q
+            self.rows[slot] = index
+            self._count[0] += 1
+            self._slots[index] = slot
+            return slot
+
+        with self.lock if self.lock is not None else contextlib.nullcontext():
+            bucket, slot = self._probe(index)
+            if slot is None:
+                slot = int(self._count[0])
+                if slot == len(self.values):
+                    raise RuntimeError(f'shared table is full ({slot} states)')
+                self.values[slot] = q
+                self.rows[slot] = index
+                # Publishing the slot last, readers never see a partial row.
+                self._buckets[bucket] = slot
+                self._count[0] += 1
+        self._slots[index] = slot
+        return slot
+
+    @staticmethod
+    def _shared_size(capacity, number_actions, dtype):
+        return 8 * (1 + capacity + _buckets(capacity)) + capacity * number_actions * np.dtype(dtype).itemsize
+
+    @staticmethod
+    def _shared_views(memory, capacity, number_actions, dtype):
+        count = np.ndarray(1, dtype=np.int64, buffer=memory.buf)
+        rows = np.ndarray(capacity, dtype=np.int64, buffer=memory.buf, offset=8)
+        buckets = np.ndarray(_buckets(capacity), dtype=np.int64, buffer=memory.buf, offset=8 + rows.nbytes)
+        values = np.ndarray((capacity, number_actions), dtype=dtype, buffer=memory.buf,
+                            offset=8 + rows.nbytes + buckets.nbytes)
+        return values, rows, count, buckets
+
+    def share(self, capacity=None, lock=None):
+        """Moves the table into a new `SharedMemory` block, `self.memory`.
+
+        Args:
+            capacity (:obj:`int`, optional): Rows of the shared table.
+                Defaults to twice the visited states, at least 65536.
+            lock (:obj:`multiprocessing.Lock`, optional): Lock of first
+                visits, `self.lock`. Defaults to a new lock.
+
+        Raises:
+            ValueError: If `capacity` is below the visited states.
+
+        """
+        count = len(self)
+        capacity = capacity if capacity is not None else max(2 * count, 65536)
+        if capacity < count:
+            raise ValueError(f'capacity {capacity} is below the {count} visited states')
+
+        dtype = self.values.dtype
+        memory = shared_memory.SharedMemory(create=True, size=self._shared_size(capacity, self.number_actions, dtype))
+        values, rows, shared_count, buckets = self._shared_views(memory, capacity, self.number_actions, dtype)
+        values[:count] = self.values[:count]
+        rows[:count] = self.rows[:count]
+        buckets[:] = _EMPTY
+
+        self._allocate(values, rows, shared_count, buckets)
+        for slot, index in enumerate(rows[:count].tolist()):
+            buckets[self._probe(index)[0]] = slot
+        shared_count[0] = count
+        self.memory = memory
+        self.lock = lock if lock is not None else multiprocessing.Lock()
+        return self
+
+    @classmethod
+    def attach(cls, name, shape, n_allies, n_enemies, number_actions=5, dtype=np.float64, capacity=65536,
+               lock=None):
+        """Opens a table of `capacity` rows shared by another process
+        under `name`, whose first visits take `lock`."""
+        table = cls(shape, n_allies, n_enemies, number_actions, dtype, capacity=1)
+        table.memory = shared_memory.SharedMemory(name=name)
+        table._allocate(*cls._shared_views(table.memory, capacity, number_actions, dtype))
+        table.lock = lock
+        return table
+
+    def close(self):
+        """Detaches a shared table from its memory block."""
+        if self.memory is None:
+            return
+
+        self.values = self.rows = self._count = self._buckets = None
+        self._slots = {}
+        self.memory.close()
+        self.memory = None
+
+    def unshare(self):
+        """Moves a shared table back to private memory and frees the block."""
+        if self.memory is None:
+            return self
+
+        count = len(self)
+        values = self.values[:max(count, 1)].copy()
+        rows = self.rows[:max(count, 1)].copy()
+
+        memory = self.memory
+        self.close()
+        self._allocate(values, rows, np.array([count], dtype=np.int64))
+        self._slots = dict(zip(rows[:count].tolist(), range(count)))
+        self.lock = None
+        memory.unlink()
+        return self
+
+    def _rank(self, positions):
+        width = self.shape[1]
+        rank = 0
+        for i, (y, x) in enumerate(positions):
+            rank += self._binomials[i + 1][y * width + x + i]
+        return rank
+
+    def _unrank(self, rank, k):
+        width = self.shape[1]
+        cells = []
+        for i in range(k, 0, -1):
+            d = bisect.bisect_right(self._binomials[i], rank) - 1
+            rank -= self._binomials[i][d]
+            cells.append(d - (i - 1))
+        return tuple(divmod(cell, width) for cell in reversed(cells))
+
+    def index(self, key):
+        """Packed index of `key`, whose ally and enemy positions must be sorted."""
+        position, allies, enemies = key
+
+        ally_offset = self._ally_offsets.get(allies)
+        if ally_offset is None:
+            ally_offset = self._ally_offsets[allies] = self._rank(allies) * self._enemy_states
+
+        enemy_offset = self._enemy_offsets.get(enemies)
+        if enemy_offset is None:
+            enemy_offset = self._enemy_offsets[enemies] = self._rank(enemies)
+
+        return self._position_offsets[position] + ally_offset + enemy_offset
+
+    def indices(self, positions, allies, enemies):
+        """Vectorized `index` over flat cell indices.
+
+        Args:
+            positions (:obj:`numpy.ndarray`): Own cells, shape `(n,)`.
+            allies (:obj:`numpy.ndarray`): Sorted ally cells, shape
+                `(n, n_allies)`.
+            enemies (:obj:`numpy.ndarray`): Sorted enemy cells, shape
+                `(n, n_enemies)`.
+
+        """
+        index = positions.astype(np.int64)
+        index = index * self._ally_states + self._ranks(allies)
+        return index * self._enemy_states + self._ranks(enemies)
+
+    def _ranks(self, cells):
+        rank = np.zeros(len(cells), dtype=np.int64)
+        for i in range(cells.shape[1]):
+            rank += self._binomial_array[i + 1, cells[:, i] + i]
+        return rank
+
+    def key(self, index):
+        index, enemies = divmod(int(index), self._enemy_states)
+        index, allies = divmod(index, self._ally_states)
+        return (
+            divmod(index, self.shape[1]),
+            self._unrank(allies, self.n_allies),
+            self._unrank(enemies, self.n_enemies)
+        )
+
+    def slots(self, indices, default=None):
+        """Slots in `values` of the packed `indices`, as returned by
+        `indices`.
+
+        Unvisited indices get a new slot holding `default(index)`, or
+        -1 if `default` is `None`. New slots may reallocate `values`, so
+        read it after the call.
+        """
+        slots = np.empty(len(indices), dtype=np.int64)
+        for i, index in enumerate(indices.tolist()):
+            slot = self._slot(index)
+            if slot is None:
+                slot = -1 if default is None else self._insert(index, default(index))
+            slots[i] = slot
+        return slots
+
+    def get(self, key, default=None):
+        slot = self._slot(self.index(key))
+        if slot is None:
+            return default
+        return self._row(slot)
+
+    def _row(self, slot):
+        # Rows of a shared table are read as snapshots, since other
+        # processes may update them while they are being used.
+        if self.memory is not None:
+            return self.values[slot].copy()
+        return self.values[slot]
+
+    def __getitem__(self, key):
+        slot = self._slot(self.index(key))
+        if slot is None:
+            raise KeyError(key)
+        return self.values[slot]
+
+    def __setitem__(self, key, q):
+        index = self.index(key)
+        slot = self._slot(index)
+        if slot is None:
+            self._insert(index, q)
+        elif self.locks:
+            with self.locks[index % len(self.locks)]:
+                self.values[slot] = q
+        else:
+            self.values[slot] = q
+
+    def update(self, key, action, value):
+        """Sets the q-value of `action` in the visited state `key` and
+        returns its row, as `get` does.
+
+        With `locks`, the write takes the lock of the stripe of `key`, so
+        it is not interleaved with other writes to the row.
+        """
+        index = self.index(key)
+        slot = self._slot(index)
+        if slot is None:
+            raise KeyError(key)
+
+        if self.locks:
+            with self.locks[index % len(self.locks)]:
+                self.values[slot, action] = value
+        else:
+            self.values[slot, action] = value
+        return self._row(slot)
+
+    def setdefault(self, key, q):
+        index = self.index(key)
+        slot = self._slot(index)
+        if slot is None:
+            slot = self._insert(index, q)
+        return self._row(slot)
+
+    def __contains__(self, key):
+        return self._slot(self.index(key)) is not None
+
+    def __len__(self):
+        return int(self._count[0])
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        for index in self.rows[:len(self)].tolist():
+            yield self.key(index)
+
+    def items(self):
+        count = len(self)
+        for index, q in zip(self.rows[:count].tolist(), self.values[:count]):
+            yield self.key(index), q
+
+    def copy(self):
+        """Private copy of the visited rows."""
+        table = QTable.__new__(QTable)
+        table.__dict__.update(self.__dict__)
+        table.locks = ()
+        table.lock = None
+        table.memory = None
+        # The count is read first, so rows visited while copying are left
+        # out whole.
+        count = len(self)
+        rows = self.rows[:max(count, 1)].copy()
+        table._allocate(self.values[:max(count, 1)].copy(), rows, np.array([count], dtype=np.int64))
+        table._slots = dict(zip(rows[:count].tolist(), range(count)))
+        table._ally_offsets = self._ally_offsets.copy()
+        table._enemy_offsets = self._enemy_offsets.copy()
+        return table
+
+    def __getstate__(self):
+        state = {name: getattr(self, name) for name in ('shape', 'n_allies', 'n_enemies', 'number_actions')}
+        count = len(self)
+        state['values'] = (self.values.dtype, self.rows[:count].copy(), self.values[:count].copy())
+        return state
+
+    def __setstate__(self, state):
+        dtype, rows, values = state['values']
+        self.__init__(state['shape'], state['n_allies'], state['n_enemies'], state['number_actions'], dtype,
+                      capacity=len(rows))
+        self.values[:len(rows)] = values
+        self.rows[:len(rows)] = rows
+        self._count[0] = len(rows)
+        self._slots = dict(zip(rows.tolist(), range(len(rows))))
@@ -0,0 +1,79 @@
+import numpy as np
+
+from ctf.q_learning.trainer import TransitionBuffer
+
+
+class Replay:
+    def __init__(self, units, capacity=100000, batch_size=256, every=1, seed=None):
+        """Experience replay for a `Model`, given as its `replay`.
+
+        The model stops updating q-values as it steps and only appends
+        its transitions here. Every `every` steps a minibatch of
+        `batch_size` transitions is drawn uniformly from the last
+        `capacity` and learned at once: the temporal-difference errors
+        are computed with fancy indexing into the `QTable` of each actor,
+        all from the q-values before the batch, and averaged over the
+        transitions of a batch that share a state and action, so a pair
+        drawn several times moves by one step of `alpha`.
+
+        Every actor must use a `QTable` as `q_values`.
+
+        Args:
+            units (:obj:`int`): Number of units in the game.
+            capacity (:obj:`int`, optional): Transitions kept. Defaults
+                to 100000.
+            batch_size (:obj:`int`, optional): Transitions per update.
+                Defaults to 256.
+            every (:obj:`int`, optional): Steps between updates. Defaults
+                to 1.
+            seed (:obj:`int`, optional): Seed of the minibatch draws.
+
+        """
+        self.buffer = TransitionBuffer(capacity, units)
+        self.batch_size = batch_size
+        self.every = every
+        self.rng = np.random.default_rng(seed)
+        self.steps = 0
+        self.updates = 0
+
+    def append(self, actor, observation, action, cost, next_observation):
+        self.buffer.append(actor, observation, action, cost, next_observation)
+
+    def step(self, model):
+        self.steps += 1
+        if self.steps % self.every == 0 and self.buffer.size >= self.batch_size:
+            self.learn(model.state.get_actors(), model.alpha, model.gamma)
+
+    @staticmethod
+    def _slots(actor, observations):
+        """`QTable` slots of flattened observations, importing the
+        q-values of states not visited yet."""
+        table = actor.q_values
+        cells = observations[:, 0::2].astype(np.int64) * table.shape[1] + observations[:, 1::2]
+        indices = table.indices(cells[:, 0], cells[:, 1:1 + table.n_allies], cells[:, 1 + table.n_allies:])
+        return table.slots(indices, lambda index: actor.impexp.get_q_values(actor, table.key(index)))
+
+    def learn(self, actors, alpha, gamma):
+        """Learns a minibatch for the q-values of `actors`."""
+        buffer = self.buffer
+        rows = self.rng.integers(buffer.size, size=self.batch_size)
+        batch_actors = buffer.actors[rows]
+
+        for i in np.unique(batch_actors):
+            actor = actors[i]
+            selected = rows[batch_actors == i]
+            index = self._slots(actor, buffer.observations[selected])
+            next_index = self._slots(actor, buffer.next_observations[selected])
+            values = actor.q_values.values
+            action = buffer.actions[selected].astype(np.int64)
+
+            q = values[index, action]
+            target = buffer.costs[selected] + gamma * values[next_index].min(axis=1)
+            cells, inverse, counts = np.unique(index * values.shape[1] + action, return_inverse=True,
+                                               return_counts=True)
+            errors = np.bincount(inverse.reshape(-1), weights=target - q, minlength=len(cells)) / counts
+            values[cells // values.shape[1], cells % values.shape[1]] += alpha * errors
+
+            actor.impexp.export_rows(actor, index)
+
+        self.updates += 1
@@ -0,0 +1,169 @@
+import glob
+import os
+import time
+
+import numpy as np
+
+from ctf.q_learning.mapped import _flatten
+
+
+class TransitionBuffer:
+    def __init__(self, capacity, units, directory=None):
+        """Ring buffer of `(observation, action, cost, next_observation)`
+        transitions in preallocated arrays, given to a `Model` as its
+        `buffer`.
+
+        Observations are stored flattened as the `y, x` coordinates of
+        the unit, its allies and its enemies, in the orientation of its
+        team, along with the index of the actor in `get_actors`.
+
+        Without `directory` the oldest transitions are overwritten once
+        `capacity` is reached. With it, the buffer is written to
+        `chunk_%06d.npz` files whenever it fills up and on `flush`, so
+        every transition ends up on disk; `load_transitions` reads them
+        back.
+
+        Args:
+            capacity (:obj:`int`): Number of transitions held.
+            units (:obj:`int`): Number of units in the game.
+            directory (:obj:`str`, optional): Directory of the chunks,
+                created if missing.
+
+        """
+        self.capacity = capacity
+        self.directory = directory
+        self.actors = np.zeros(capacity, dtype=np.int16)
+        self.observations = np.zeros((capacity, units * 2), dtype=np.int16)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.costs = np.zeros(capacity, dtype=np.float64)
+        self.next_observations = np.zeros((capacity, units * 2), dtype=np.int16)
+
+        self.size = 0
+        self.position = 0
+        self.total = 0
+        self.chunks = 0
+        self._flushed = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def append(self, actor, observation, action, cost, next_observation):
+        if self.position == self.capacity:
+            if self.directory is not None:
+                self.flush()
+            self.position = self._flushed = 0
+
+        i = self.position
+        self.actors[i] = actor
+        self.observations[i] = _flatten(observation)
+        self.actions[i] = action
+        self.costs[i] = cost
+        self.next_observations[i] = _flatten(next_observation)
+
+        self.position += 1
+        self.size = max(self.size, self.position)
+        self.total += 1
+
+    def flush(self):
+        """Writes the transitions appended since the last chunk as a new
+        chunk, if there is a `directory`."""
+        if self.directory is None or self.position == self._flushed:
+            return
+
+        rows = slice(self._flushed, self.position)
+        np.savez(
+            os.path.join(self.directory, 'chunk_{:06d}.npz'.format(self.chunks)),
+            actors=self.actors[rows],
+            observations=self.observations[rows],
+            actions=self.actions[rows],
+            costs=self.costs[rows],
+            next_observations=self.next_observations[rows]
+        )
+        self.chunks += 1
+        self._flushed = self.position
+
+    def close(self):
+        self.flush()
+
+
+def load_transitions(directory):
+    """Concatenates the chunks written by a `TransitionBuffer`.
+
+    Returns:
+        :obj:`dict`: `actors`, `observations`, `actions`, `costs` and
+        `next_observations` arrays, in the order they were appended.
+
+    """
+    chunks = [np.load(path) for path in sorted(glob.glob(os.path.join(directory, 'chunk_*.npz')))]
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0].files}
+
+
+class Trainer:
+    def __init__(self, model, buffer=None):
+        """Runs a `Model` for a number of steps or episodes.
+
+        An episode ends when a team scores, which is when `Ctf` resets
+        the board in `update_after`.
+
+        Args:
+            model (:obj:`Model`): Model to run.
+            buffer (:obj:`TransitionBuffer`, optional): Receives every
+                transition of the model.
+
+        """
+        self.model = model
+        self.buffer = buffer
+        model.buffer = buffer
+
+        self.steps = 0
+        self.episodes = 0
+        self.episode_steps = []
+        self._episode_start = 0
+
+    def run(self, steps=None, episodes=None, until=None):
+        """Runs until `steps` more steps or `episodes` more episodes have
+        been run, or `until(trainer)` returns `True` after a step,
+        whichever comes first.
+
+        Returns:
+            :obj:`dict`: The `steps` and `episodes` run by this call, its
+            `seconds`, and the `score` and `captures` of the game.
+
+        Raises:
+            ValueError: If no stopping criterion is given.
+
+        """
+        if steps is None and episodes is None and until is None:
+            raise ValueError('one of steps, episodes or until is required')
+
+        start = time.perf_counter()
+        first_step = self.steps
+        first_episode = self.episodes
+        while True:
+            score = self.model.state.score
+            self.model.run()
+            self.steps += 1
+
+            if self.model.state.score != score:
+                self.episodes += 1
+                self.episode_steps.append(self.steps - self._episode_start)
+                self._episode_start = self.steps
+
+            if steps is not None and self.steps - first_step >= steps:
+                break
+            if episodes is not None and self.episodes - first_episode >= episodes:
+                break
+            if until is not None and until(self):
+                break
+
+        return {
+            'steps': self.steps - first_step,
+            'episodes': self.episodes - first_episode,
+            'seconds': time.perf_counter() - start,
+            'score': self.model.state.score,
+            'captures': self.model.state.captures
+        }
+
+    def close(self):
+        if self.buffer is not None:
+            self.buffer.close()
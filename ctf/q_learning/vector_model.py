@@ -0,0 +1,62 @@
+import numpy as np
+
+
+class VectorModel:
+    def __init__(self, initial, alpha=0.3, gamma=0.9, eps=0.15, seed=None):
+        """Batched counterpart of `Model`, stepping every game of a
+        vectorized environment such as `VectorCtf` at once.
+
+        Every actor must use a `QTable` as `q_values`. All games update
+        the same tables; when several games hit the same state and
+        action in one step, the last update wins.
+
+        """
+        self.state = initial
+        self.next_state = initial.copy()
+        self.alpha = alpha
+        self.gamma = gamma
+        self.eps = eps
+        self.rng = np.random.default_rng(seed)
+
+    def get_slots(self, state, unit):
+        """Slots in the `QTable` of `unit` of its states in every game,
+        importing the q-values of states not visited yet."""
+        actor = state.get_actors()[unit]
+        table = actor.q_values
+        indices = table.indices(*state.observation(unit))
+        return table.slots(indices, lambda index: actor.impexp.get_q_values(actor, table.key(index)))
+
+    def e_greedy(self, q):
+        ties = np.isclose(q, q.min(axis=1, keepdims=True))
+        actions = np.argmax(ties * self.rng.random(q.shape), axis=1)
+
+        explore = self.rng.random(len(q)) < self.eps
+        actions[explore] = self.rng.integers(q.shape[1], size=np.count_nonzero(explore))
+        return actions
+
+    def run(self):
+        actors = self.state.get_actors()
+        slots = [self.get_slots(self.state, unit) for unit in range(len(actors))]
+        actions = np.stack([
+            self.e_greedy(actor.q_values.values[slot]) for actor, slot in zip(actors, slots)
+        ], axis=1)
+
+        next_state = self.state.copy(self.next_state)
+        next_state.apply_actions(actions)
+        next_state.update_before()
+
+        for unit, actor in enumerate(actors):
+            action = actions[:, unit]
+            next_slots = self.get_slots(next_state, unit)
+            values = actor.q_values.values
+
+            q = values[slots[unit], action]
+            cost = self.state.cost(unit, action)
+            values[slots[unit], action] = q + self.alpha * (cost + self.gamma * values[next_slots].min(axis=1) - q)
+
+            actor.impexp.export_rows(actor, slots[unit])
+
+        self.next_state = self.state
+        self.state = next_state
+
+        self.state.update_after()
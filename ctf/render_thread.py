@@ -0,0 +1,124 @@
+"""Rendering of Capture The Flag (Ctf) games on a separate thread."""
+import collections
+import threading
+import time
+
+
+class UnitSnapshot(collections.namedtuple('UnitSnapshot', 'name team position has_flag jail_timer')):
+    """Immutable copy of the rendered state of a `Unit`."""
+    __slots__ = ()
+
+    def in_jail(self):
+        return self.jail_timer > 0
+
+
+FlagSnapshot = collections.namedtuple('FlagSnapshot', 'team position grounded')
+
+GameSnapshot = collections.namedtuple('GameSnapshot', 'board units flags score captures turn')
+
+
+def snapshot(game):
+    """Returns an immutable `GameSnapshot` of what `Ctf.render` draws."""
+    return GameSnapshot(
+        board=game.board,
+        units=tuple(
+            tuple(UnitSnapshot(unit.name, unit.team, unit.position, unit.has_flag, unit.jail_timer) for unit in team)
+            for team in game.units
+        ),
+        flags=tuple(FlagSnapshot(flag.team, flag.position, flag.grounded) for flag in game.flags),
+        score=game.score,
+        captures=game.captures,
+        turn=game.turn
+    )
+
+
+class RenderThread(threading.Thread):
+    """`RenderThread` class, draws published snapshots at a capped rate.
+
+    The simulation `publish`es snapshots without waiting; the thread
+    draws the latest one at most `fps` times per second and drops the
+    snapshots published in between. The renderer is created on the
+    thread itself, since OpenGL contexts belong to the thread that made
+    them.
+
+    An exception raised while creating the renderer is raised by
+    `start`, one raised while drawing by the next `publish`; the thread
+    stops in both cases.
+    """
+
+    def __init__(self, make_renderer, draw, fps=30):
+        """Initialization of `RenderThread` object.
+
+        Args:
+            make_renderer (:obj:`callable`): Returns the renderer.
+            draw (:obj:`callable`): Draws a snapshot, called as
+                `draw(renderer, snapshot)`.
+            fps (:obj:`float`, optional): Maximum frames per second.
+                Defaults to 30.
+
+        """
+        super().__init__(name='Ctf-render', daemon=True)
+        self.make_renderer = make_renderer
+        self.draw = draw
+        self.fps = fps
+        self.published = 0
+        self.drawn = 0
+
+        self.error = None
+
+        self._latest = None
+        self._event = threading.Event()
+        self._ready = threading.Event()
+        self._stopped = False
+
+    def _check(self):
+        if self.error is not None:
+            raise self.error
+
+    def start(self):
+        """Starts the thread once its renderer is created."""
+        super().start()
+        self._ready.wait()
+        self._check()
+
+    def publish(self, snapshot):
+        """Makes `snapshot` the next one to draw, replacing any pending one."""
+        self._check()
+        self._latest = snapshot
+        self.published += 1
+        self._event.set()
+
+    def run(self):
+        try:
+            renderer = self.make_renderer()
+        except Exception as error:
+            self.error = error
+            return
+        finally:
+            self._ready.set()
+
+        try:
+            self._draw_loop(renderer)
+        except Exception as error:
+            self.error = error
+
+    def _draw_loop(self, renderer):
+        interval = 1.0 / self.fps if self.fps else 0.0
+        next_frame = time.monotonic()
+
+        while not self._stopped:
+            if not self._event.wait(timeout=0.1):
+                continue
+            self._event.clear()
+
+            self.draw(renderer, self._latest)
+            self.drawn += 1
+
+            next_frame = max(next_frame + interval, time.monotonic())
+            time.sleep(max(next_frame - time.monotonic(), 0.0))
+
+    def stop(self):
+        """Stops drawing and waits for the thread to finish."""
+        self._stopped = True
+        self._event.set()
+        self.join()
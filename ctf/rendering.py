@@ -50,6 +50,15 @@ class Renderer(object):
         gl.glEnable(gl.GL_BLEND)
         gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
 
+        self._grid_board = None
+        self._grid_batch = None
+        self._pieces_batch = None
+        self._unit_vertices = None
+        self._flag_vertices = None
+        self._unit_labels = None
+        self._scoreboard_dims = None
+        self._scoreboard_batch = None
+
         font_path = io.resource_path('PressStart2P-Regular.ttf')
         pyglet.font.add_file(font_path)
         press_start_2p = pyglet.font.load('Press Start 2P')
@@ -59,17 +68,25 @@ class Renderer(object):
 
         This method draws a gray and white grid on the left side of the
         window. This grid is where the pieces drawn by `draw_pieces`
-        will go.
+        will go. The grid is built into a single vertex list the first
+        time a board is drawn and only redrawn afterwards.
 
         Args:
-            dims (:obj:`tuple`): Dimensions of the board being drawn.
+            board (:obj:`numpy.ndarray`): The board being drawn.
 
         """
+        if self._grid_board is not board:
+            self._build_grid(board)
+        self._grid_batch.draw()
+
+    def _build_grid(self, board):
         dims = board.shape
+        coordinates = []
+        colors = []
         odd = True
         for y in range(dims[0]):
             for x in range(dims[1]):
-                coordinates = [
+                coordinates += [
                     self.x_pad + x * self.box,
                     self.y_pad + y * self.box,
                     self.x_pad + x * self.box,
@@ -82,107 +99,112 @@ class Renderer(object):
 
                 if board[y][x] == 0:
                     if y < dims[0] / 2:
-                        colors = ([181, 244, 171] if odd else [85, 152, 0]) * 4
+                        colors += ([181, 244, 171] if odd else [85, 152, 0]) * 4
                     else:
-                        colors = ([218, 249, 197] if odd else [170, 203, 0]) * 4
+                        colors += ([218, 249, 197] if odd else [170, 203, 0]) * 4
                 else:
-                    colors = (50, 50, 50) * 4
+                    colors += (50, 50, 50) * 4
                 odd = not odd
 
-                pyglet.graphics.draw(
-                    4,
-                    gl.GL_QUADS,
-                    ('v2f', coordinates),
-                    ('c3B', colors)
-                )
+        self._grid_batch = pyglet.graphics.Batch()
+        self._grid_batch.add(
+            4 * dims[0] * dims[1],
+            gl.GL_QUADS,
+            None,
+            ('v2f', coordinates),
+            ('c3B', colors)
+        )
+        self._grid_board = board
+
+    def _quad(self, position, board, pad):
+        x = position[1]
+        y = board.shape[0] - (position[0] + 1)
+
+        l = self.x_pad + x * self.box + pad
+        r = self.x_pad + (x + 1) * self.box - pad
+        b = self.y_pad + y * self.box + pad
+        t = self.y_pad + (y + 1) * self.box - pad
+
+        return [l, b, l, t, r, t, r, b]
 
     def draw_pieces(self, board, units, flags):
         """Method for drawing the pieces on the window.
 
         This method draws each of the games pieces within boxes on the
-        grid drawn by `draw_grid`.
+        grid drawn by `draw_grid`. All pieces share one batch whose
+        vertices are updated in place every frame; hidden pieces
+        (jailed units and carried flags) are collapsed to a point.
 
         Args:
-            dims (:obj:`tuple`): Dimensions of the board being drawn.
-            key (:obj:`dict`): Private `_key` key from `Ctf`.
+            board (:obj:`numpy.ndarray`): The board being drawn.
+            units (:obj:`tuple`): Units of each team.
+            flags (:obj:`tuple`): Flag of each team.
 
         """
-        for i in range(2):
-            for unit in units[i]:
-                unit_x = unit.position[1]
-                unit_y = board.shape[0] - (unit.position[0] + 1)
-
-                l = self.x_pad + unit_x * self.box + self.unit_pad
-                r = self.x_pad + (unit_x + 1) * self.box - self.unit_pad
-                b = self.y_pad + unit_y * self.box + self.unit_pad
-                t = self.y_pad + (unit_y + 1) * self.box - self.unit_pad
-
-                unit_coordinates = [
-                    l, b,
-                    l, t,
-                    r, t,
-                    r, b
-                ]
-
-                if unit.team == 0:
-                    if unit.has_flag:
-                        unit_colors = [255, 150, 0] * 4
-                    else:
-                        unit_colors = [255, 0, 0] * 4
-                else:
-                    if unit.has_flag:
-                        unit_colors = [0, 150, 255] * 4
-                    else:
-                        unit_colors = [0, 0, 255] * 4
-
-                if not unit.in_jail():
-                    pyglet.graphics.draw(
-                        4,
-                        gl.GL_QUADS,
-                        ('v2f', unit_coordinates),
-                        ('c3B', unit_colors)
-                    )
-
-                    unit_label = pyglet.text.Label(
-                        unit.name,
-                        font_name='Press Start 2P',
-                        font_size=8,
-                        x=(l + r) / 2.0,
-                        y=(t + b) / 2.0,
-                        anchor_x='center',
-                        anchor_y='center',
-                        color=(255, 255, 255, 255)
-                    )
-                    unit_label.draw()
-
-            unit_x = flags[i].position[1]
-            unit_y = board.shape[0] - (flags[i].position[0] + 1)
-
-            flag_coordinates = [
-                self.x_pad + unit_x * self.box + self.unit_pad * 2,
-                self.y_pad + unit_y * self.box + self.unit_pad * 2,
-                self.x_pad + unit_x * self.box + self.unit_pad * 2,
-                self.y_pad + (unit_y + 1) * self.box - self.unit_pad * 2,
-                self.x_pad + (unit_x + 1) * self.box - self.unit_pad * 2,
-                self.y_pad + (unit_y + 1) * self.box - self.unit_pad * 2,
-                self.x_pad + (unit_x + 1) * self.box - self.unit_pad * 2,
-                self.y_pad + unit_y * self.box + self.unit_pad * 2
+        count = len(units[0]) + len(units[1])
+        if self._unit_vertices is None or self._unit_vertices.get_size() != 4 * count:
+            self._unit_labels = [
+                pyglet.text.Label(
+                    '',
+                    font_name='Press Start 2P',
+                    font_size=8,
+                    anchor_x='center',
+                    anchor_y='center',
+                    color=(255, 255, 255, 255)
+                )
+                for _ in range(count)
             ]
+            self._pieces_batch = pyglet.graphics.Batch()
+            self._unit_vertices = self._pieces_batch.add(
+                4 * count, gl.GL_QUADS, pyglet.graphics.OrderedGroup(0), 'v2f/stream', 'c3B/stream'
+            )
+            self._flag_vertices = self._pieces_batch.add(
+                8, gl.GL_QUADS, pyglet.graphics.OrderedGroup(1), 'v2f/stream', 'c3B/static'
+            )
+            self._flag_vertices.colors[:] = [255, 0, 0] * 4 + [0, 0, 255] * 4
+
+        unit_coordinates = []
+        unit_colors = []
+        labels = []
+        for unit, unit_label in zip(units[0] + units[1], self._unit_labels):
+            if unit.in_jail():
+                unit_coordinates += [0.0] * 8
+            else:
+                coordinates = self._quad(unit.position, board, self.unit_pad)
+                unit_coordinates += coordinates
+                labels.append((unit_label, unit.name, coordinates))
 
-            if flags[i].team == 0:
-                flag_colors = [255, 0, 0] * 4
+            if unit.team == 0:
+                unit_colors += [255, 150, 0] * 4 if unit.has_flag else [255, 0, 0] * 4
             else:
-                flag_colors = [0, 0, 255] * 4
-
-            if flags[i].grounded:
-                pyglet.graphics.draw(
-                    4,
-                    gl.GL_QUADS,
-                    ('v2f', flag_coordinates),
-                    ('c3B', flag_colors)
-                )
-    
-    def _draw_statistic(self, dims, stats, name, pad=0):
+                unit_colors += [0, 150, 255] * 4 if unit.has_flag else [0, 0, 255] * 4
+
+        flag_coordinates = []
+        for flag in flags:
+            if flag.grounded:
+                flag_coordinates += self._quad(flag.position, board, self.unit_pad * 2)
+            else:
+                flag_coordinates += [0.0] * 8
+
+        self._unit_vertices.vertices[:] = unit_coordinates
+        self._unit_vertices.colors[:] = unit_colors
+        self._flag_vertices.vertices[:] = flag_coordinates
+        self._pieces_batch.draw()
+
+        for unit_label, name, (l, b, _, t, r, _, _, _) in labels:
+            self._set_text(unit_label, name)
+            position = ((l + r) / 2.0, (t + b) / 2.0)
+            if (unit_label.x, unit_label.y) != position:
+                unit_label.position = position
+            unit_label.draw()
+
+    @staticmethod
+    def _set_text(label, text):
+        # Setting the text of a label lays it out again, even if unchanged.
+        if label.text != text:
+            label.text = text
+
+    def _add_statistic(self, dims, name, pad=0):
         grid_limit = self.x_pad + dims[1] * self.box
         score_x = (self.width + grid_limit) / 2.0
 
@@ -194,9 +216,9 @@ class Renderer(object):
             y=self.height - self.y_pad - pad,
             anchor_x='center',
             anchor_y='top',
-            color=(0, 0, 0, 255)
+            color=(0, 0, 0, 255),
+            batch=self._scoreboard_batch
         )
-        score_label.draw()
 
         bar_1_coordinates = [
             score_x - score_label.content_width / 2.0,
@@ -209,9 +231,10 @@ class Renderer(object):
             self.height - self.y_pad - score_label.content_height - 10 - pad
         ]
         bar_1_colors = [0, 0, 0]*4
-        pyglet.graphics.draw(
+        self._scoreboard_batch.add(
             4,
             gl.GL_QUADS,
+            None,
             ('v2f', bar_1_coordinates),
             ('c3B', bar_1_colors)
         )
@@ -229,67 +252,83 @@ class Renderer(object):
             bar_2_bottom
         ]
         bar_2_colors = [0, 0, 0]*4
-        pyglet.graphics.draw(
+        self._scoreboard_batch.add(
             4,
             gl.GL_QUADS,
+            None,
             ('v2f', bar_2_coordinates),
             ('c3B', bar_2_colors)
         )
 
         score_0_label = pyglet.text.Label(
-            str(stats[0]),
+            '',
             font_name='Press Start 2P',
             font_size=24,
             x=score_x - 4,
             y=bar_2_top,
             anchor_x='right',
             anchor_y='top',
-            color=(255, 0, 0, 255)
+            color=(255, 0, 0, 255),
+            batch=self._scoreboard_batch
         )
-        score_0_label.draw()
 
         score_1_label = pyglet.text.Label(
-            str(stats[1]),
+            '',
             font_name='Press Start 2P',
             font_size=24,
             x=score_x + 8,
             y=bar_2_top,
             anchor_x='left',
             anchor_y='top',
-            color=(0, 0, 255, 255)
+            color=(0, 0, 255, 255),
+            batch=self._scoreboard_batch
         )
-        score_1_label.draw()
 
-        return self.height - bar_2_bottom
+        return (score_0_label, score_1_label), self.height - bar_2_bottom
 
+    def _build_scoreboard(self, dims):
+        self._scoreboard_batch = pyglet.graphics.Batch()
+
+        self._turn_label = pyglet.text.Label(
+            '',
+            font_name='Press Start 2P',
+            font_size=10,
+            x=self.width,
+            y=0,
+            anchor_x='right',
+            anchor_y='bottom',
+            color=(150, 150, 150, 255),
+            batch=self._scoreboard_batch
+        )
+
+        self._score_labels, pad = self._add_statistic(dims, "Score")
+        self._captures_labels, _ = self._add_statistic(dims, "Captures", pad)
+        self._scoreboard_dims = dims
 
     def draw_scoreboard(self, dims, turn, score, captures):
         """Method for drawing the scoreboard and logs on the window.
 
         This method draws a pixelart inspired scoreboard in the top
         right of the window and then draws the games logs underneath
-        it.
+        it. The scoreboard is built once per board size, afterwards only
+        the text of labels whose value changed is updated.
 
         Args:
             dims (:obj:`tuple`): The dimensions of the board being drawn.
-            score (:obj:`dict`): The score of the game being drawn.
-            logs (:obj:`list`): The logs of the game being drawn.
+            turn (:obj:`int`): The turn of the game being drawn.
+            score (:obj:`tuple`): The score of the game being drawn.
+            captures (:obj:`tuple`): The captures of the game being drawn.
 
         """
-        turn_label = pyglet.text.Label(
-            "{:,}".format(turn),
-            font_name='Press Start 2P',
-            font_size=10,
-            x=self.width,
-            y=0,
-            anchor_x='right',
-            anchor_y='bottom',
-            color=(150, 150, 150, 255)
-        )
-        turn_label.draw()
+        if self._scoreboard_dims != dims:
+            self._build_scoreboard(dims)
+
+        self._set_text(self._turn_label, "{:,}".format(turn))
+        for labels, stats in ((self._score_labels, score), (self._captures_labels, captures)):
+            self._set_text(labels[0], str(stats[0]))
+            self._set_text(labels[1], str(stats[1]))
 
-        pad = self._draw_statistic(dims, score, "Score")
-        self._draw_statistic(dims, captures, "Captures", pad)
+        self._scoreboard_batch.draw()
 
     def init_window(self):
         """Method for initializing the window to be drawn on.
@@ -0,0 +1,141 @@
+"""Capture The Flag (Ctf) games stepped in lockstep with NumPy."""
+import numpy as np
+
+
+class VectorCtf(object):
+    """`VectorCtf` class, handles `k` independent games of CTF at once.
+
+    Unit state is stored as `(k, units)` arrays, with positions as flat
+    cell indices (`y * width + x`), and game state as `(k, 2)` arrays.
+    Units are ordered as in `Ctf.get_actors`, team 0 first.
+    """
+    _state = ('positions', 'jail_timers', 'has_flag', 'grounded', 'score', 'captures', 'turn')
+
+    def __init__(self, game, k):
+        """Initialization of `VectorCtf` object.
+
+        Args:
+            game (:obj:`Ctf`): Game every copy starts from. Its units are
+                kept as `actors` and provide the q-values to learn.
+            k (:obj:`int`): Number of games.
+
+        """
+        self.board = game.board
+        self.k = k
+        self.jail_timer = game.jail_timer
+        self.actors = game.get_actors()
+        self.moves = game.moves.reshape(2, -1, 5)
+
+        height, width = self.board.shape
+        self.cells = height * width
+        self.width = width
+        self.team = np.array([actor.team for actor in self.actors])
+        self.teams = (np.flatnonzero(self.team == 0), np.flatnonzero(self.team == 1))
+        self.initial_positions = np.array([y * width + x for y, x in (actor.initial_position for actor in self.actors)])
+        self.flag_positions = np.array([y * width + x for y, x in (flag.position for flag in game.flags)])
+        self.flag_distances = game.flag_distances.reshape(2, -1)
+        self.shaping = game.shaping
+
+        self.positions = np.tile([y * width + x for y, x in (actor.position for actor in self.actors)], (k, 1))
+        self.jail_timers = np.tile([actor.jail_timer for actor in self.actors], (k, 1))
+        self.has_flag = np.tile([actor.has_flag for actor in self.actors], (k, 1))
+        self.grounded = np.tile([flag.grounded for flag in game.flags], (k, 1))
+        self.score = np.tile(game.score, (k, 1))
+        self.captures = np.tile(game.captures, (k, 1))
+        self.turn = np.full(k, game.turn)
+
+    def copy(self, out=None):
+        """Copies the games, into the arrays of `out` if given."""
+        if out is None:
+            out = VectorCtf.__new__(VectorCtf)
+            out.__dict__.update(self.__dict__)
+            for name in self._state:
+                setattr(out, name, getattr(self, name).copy())
+            return out
+
+        for name in self._state:
+            np.copyto(getattr(out, name), getattr(self, name))
+        return out
+
+    def get_actors(self):
+        return self.actors
+
+    def observation(self, unit):
+        """Observations of unit index `unit` in every game.
+
+        Returns:
+            :obj:`tuple`: Own cells `(k,)`, sorted ally cells
+            `(k, allies)` and sorted enemy cells `(k, enemies)`, in the
+            orientation of the unit's team, as taken by `QTable.indices`.
+
+        """
+        team = self.team[unit]
+        allies = self.teams[team][self.teams[team] != unit]
+        positions = self.positions if team == 0 else self.cells - 1 - self.positions
+        return (
+            positions[:, unit],
+            np.sort(positions[:, allies], axis=1),
+            np.sort(positions[:, self.teams[1 - team]], axis=1)
+        )
+
+    def cost(self, unit, actions):
+        team = self.team[unit]
+        cost = np.full(self.k, 0.5)
+
+        new_positions = self.moves[0, self.positions[:, unit], actions]
+        cost[new_positions == self.flag_positions[1 - team]] -= 0.5
+        cost[(self.flag_distances[team][self.positions[:, self.teams[1 - team]]] == 1).any(axis=1)] += 0.5
+
+        if self.shaping:
+            distances = self.flag_distances[1 - team]
+            positions = self.positions[:, unit]
+            moved = self.moves[team, positions, actions]
+            cost += self.shaping * (self.jail_timers[:, unit] == 0) * (distances[moved] - distances[positions])
+
+        return cost
+
+    def apply_actions(self, actions):
+        """Applies a `(k, units)` array of actions."""
+        jailed = self.jail_timers > 0
+        self.jail_timers -= jailed
+        moved = self.moves[self.team, self.positions, actions]
+        np.copyto(self.positions, moved, where=~jailed)
+
+    def update_before(self):
+        free = self.jail_timers == 0
+        team0, team1 = self.teams
+
+        positions0 = self.positions[:, team0, None]
+        positions1 = self.positions[:, None, team1]
+        collisions = (positions0 == positions1) & free[:, team0, None] & free[:, None, team1]
+        top = positions0 // self.width < self.board.shape[0] / 2
+
+        captured = np.zeros_like(free)
+        captured[:, team0] = (collisions & top).any(axis=2)
+        captured[:, team1] = (collisions & ~top).any(axis=1)
+
+        self.jail_timers[captured] = self.jail_timer
+        np.copyto(self.positions, self.initial_positions, where=captured)
+        self.captures[:, 1] += captured[:, team0].sum(axis=1)
+        self.captures[:, 0] += captured[:, team1].sum(axis=1)
+
+        free &= ~captured
+        for i in range(2):
+            units = self.teams[i]
+            on_flag = (self.positions[:, units] == self.flag_positions[1 - i]) & free[:, units]
+            on_flag &= self.grounded[:, 1 - i, None]
+            games = np.flatnonzero(on_flag.any(axis=1))
+            self.has_flag[games, units[on_flag[games].argmax(axis=1)]] = True
+            self.grounded[games, 1 - i] = False
+
+    def update_after(self):
+        self.score[:, 1] += ~self.grounded[:, 0]
+        self.score[:, 0] += ~self.grounded[:, 1]
+        self.reset(~self.grounded.all(axis=1))
+        self.turn += 1
+
+    def reset(self, games=slice(None)):
+        self.positions[games] = self.initial_positions
+        self.jail_timers[games] = 0
+        self.has_flag[games] = False
+        self.grounded[games] = True
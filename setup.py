@@ -24,7 +24,7 @@ setuptools.setup(
         'Source': 'https://github.com/documentedai/capture-the-flag',
         'Tracker': 'https://github.com/documentedai/capture-the-flag/issues'
     },
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=['benchmarks', 'benchmarks.*']),
     include_package_data=True,
     license='BSD',
     extras_require={
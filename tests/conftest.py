@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from ctf.api import Ctf
+from ctf.pieces import Flag, Unit
+from ctf.q_learning.impexp import ImpExp
+
+
+def _make_game(units=(2, 2), height=10, width=8, impexp=None, **kwargs):
+    """`Ctf` on a walled `height` by `width` board with one inner wall, in
+    the layout of `benchmarks.games.make_game`; `kwargs` go to `Ctf`."""
+    board = np.zeros((height, width), dtype=int)
+    board[0, :] = board[-1, :] = board[:, 0] = board[:, -1] = 1
+    board[height // 2, 2] = 1
+
+    impexp = impexp if impexp is not None else ImpExp()
+    game = Ctf(**kwargs)
+    game.new_game(
+        board,
+        (
+            [Unit(f'A{i}', 0, (1, 1 + i), impexp) for i in range(units[0])],
+            [Unit(f'B{i}', 1, (height - 2, width - 2 - i), impexp) for i in range(units[1])]
+        ),
+        (Flag(0, (1, width // 2)), Flag(1, (height - 2, width // 2 - 1)))
+    )
+    return game
+
+
+@pytest.fixture
+def make_game():
+    return _make_game
@@ -0,0 +1,65 @@
+import itertools
+import random
+
+import numpy as np
+
+
+def update_before_pairwise(game):
+    """`Ctf.update_before` as it checked every pair of units."""
+    for unit0, unit1 in itertools.product(game.units[0], game.units[1]):
+        if unit0.in_jail() or unit1.in_jail():
+            continue
+
+        if unit0.position == unit1.position:
+            if unit0.position[0] < game.board.shape[0] / 2:
+                game._capture(unit0)
+            else:
+                game._capture(unit1)
+
+    for i in range(2):
+        if game.flags[~i].grounded:
+            for unit in game.units[i]:
+                if unit.in_jail():
+                    continue
+
+                if unit.position == game.flags[~i].position:
+                    unit.has_flag = True
+                    game.flags[~i].grounded = False
+                    break
+
+
+def state(game):
+    return (
+        [(unit.position, unit.jail_timer, unit.has_flag) for team in game.units for unit in team],
+        [flag.grounded for flag in game.flags],
+        game.captures
+    )
+
+
+def test_update_before_matches_pairwise(make_game):
+    """Collisions found by position match those of the pairwise check on
+    crowded random boards, including cells shared by several units."""
+    rng = random.Random(0)
+    game = make_game((4, 4), height=6, width=5)
+    free = [tuple(cell) for cell in np.argwhere(game.board == 0).tolist()]
+    for _ in range(5000):
+        for unit in game.get_actors():
+            unit.position = rng.choice(free)
+            unit.jail_timer = rng.choice([0, 0, 0, 2])
+            unit.has_flag = False
+        for flag in game.flags:
+            flag.grounded = True
+
+        expected = game.copy()
+        update_before_pairwise(expected)
+        actual = game.copy()
+        actual.update_before()
+        assert state(actual) == state(expected)
+
+
+def test_copy_into_game_with_other_team_sizes(make_game):
+    game = make_game((3, 3))
+    out = make_game((1, 1))
+    game.copy(out)
+    assert [len(team) for team in out.units] == [3, 3]
+    assert state(out) == state(game)
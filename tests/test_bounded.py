@@ -0,0 +1,58 @@
+import numpy as np
+
+from ctf.q_learning.bounded import BoundedQValues
+from ctf.q_learning.model import Model
+
+
+def keys(count):
+    return [((1 + i // 6, 1 + i % 6), (), ((8, 1),)) for i in range(count)]
+
+
+def imported():
+    q = np.zeros(5)
+    q.flags.writeable = False
+    return q
+
+
+def test_imported_rows_are_evicted_before_learned_ones():
+    store = BoundedQValues(budget=10 ** 9, recent=0)
+    learned, read_only = keys(40)[:20], keys(40)[20:]
+    for key in learned:
+        store[key] = np.ones(5)
+    for key in read_only:
+        store.setdefault(key, imported())
+
+    store.budget = store.bytes * 0.7
+    store[((9, 9), (), ((8, 1),))] = np.ones(5)
+
+    assert store.bytes <= store.budget
+    assert store.evicted_imported > 0
+    assert store.evicted_learned == 0
+    assert all(key in store for key in learned)
+
+
+def test_spilled_rows_are_fetched_back(tmp_path):
+    store = BoundedQValues(budget=4000, spill=str(tmp_path / 'spill'), recent=4)
+    for i, key in enumerate(keys(60)):
+        store[key] = np.full(5, float(i))
+
+    assert store.stats()['spilled'] > 0
+    assert len(store) == 60
+    for i, key in enumerate(keys(60)):
+        assert store[key][0] == i
+    assert store.fetched > 0
+    assert len(store.copy()) == 60
+    store.close()
+
+
+def test_model_runs_within_budget(make_game):
+    game = make_game((2, 2))
+    for actor in game.get_actors():
+        actor.q_values = BoundedQValues(budget=200000)
+    model = Model(game, seed=0)
+    for _ in range(3000):
+        model.run()
+
+    for actor in game.get_actors():
+        assert actor.q_values.bytes <= actor.q_values.budget
+        assert actor.q_values.evictions > 0
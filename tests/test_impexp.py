@@ -0,0 +1,66 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from ctf.q_learning.impexp import ImpExp
+from ctf.q_learning.model import Model
+from ctf.q_learning.qtable import QTable
+
+
+def test_checkpoint_round_trip(tmp_path, make_game):
+    output = tmp_path / 'q'
+    impexp = ImpExp(output_file=str(output), save_every=500)
+    game = make_game((1, 0), impexp=impexp)
+    model = Model(game, seed=0)
+    for _ in range(2000):
+        model.run()
+    impexp.close()
+
+    actor = game.get_actors()[0]
+    saved = np.load(str(output) + '.npy', allow_pickle=True)[()]
+    assert saved.keys() == actor.q_values.keys()
+    assert all(np.array_equal(saved[key], q) for key, q in actor.q_values.items())
+
+    reloaded = ImpExp(input_file=str(output) + '.npy')
+    key = next(iter(saved))
+    assert np.array_equal(reloaded.get_q_values(actor, key), saved[key])
+    assert not reloaded.get_q_values(actor, key).flags.writeable
+
+
+def test_checkpoint_of_a_qtable(tmp_path, make_game):
+    output = tmp_path / 'q'
+    impexp = ImpExp(output_file=str(output))
+    game = make_game((1, 1), impexp=impexp)
+    for actor in game.get_actors():
+        actor.q_values = QTable(game.board.shape, 0, 1)
+    model = Model(game, seed=0)
+    for _ in range(200):
+        model.run()
+    impexp.close()
+
+    saved = np.load(str(output) + '.npy', allow_pickle=True)[()]
+    assert isinstance(saved, QTable)
+    assert len(saved) == len(impexp._actor.q_values)
+
+
+def test_write_errors_are_raised(tmp_path, make_game):
+    impexp = ImpExp(output_file=str(tmp_path / 'missing' / 'q'), save_every=1)
+    game = make_game((1, 0), impexp=impexp)
+    model = Model(game, seed=0)
+    with pytest.raises(FileNotFoundError):
+        for _ in range(1000):
+            model.run()
+            impexp._thread.join(0.01)
+    impexp.close()
+
+
+def test_pickle_drops_the_writer_thread(tmp_path, make_game):
+    impexp = ImpExp(output_file=str(tmp_path / 'q'))
+    game = make_game((1, 0), impexp=impexp)
+    model = Model(game, seed=0)
+    model.run()
+
+    copy = pickle.loads(pickle.dumps(impexp))
+    assert copy._thread is None and copy.output_file == impexp.output_file
+    impexp.close()
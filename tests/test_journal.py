@@ -0,0 +1,67 @@
+import json
+import os
+
+import numpy as np
+
+from ctf.q_learning.impexp import ImpExp
+from ctf.q_learning.journal import Journal
+from ctf.q_learning.model import Model
+
+
+def learned(actor):
+    return {key: q for key, q in actor.q_values.items() if q.flags.writeable}
+
+
+def test_journal_replays_to_the_learned_q_values(tmp_path, make_game):
+    """Compacted and replayed, the journal of every actor sharing one
+    `ImpExp` holds exactly the rows the actor learned."""
+    impexp = ImpExp(journal=str(tmp_path))
+    game = make_game((1, 1), impexp=impexp)
+    model = Model(game, seed=0)
+    for _ in range(3000):
+        model.run()
+    impexp.close()
+
+    for actor in game.get_actors():
+        path = tmp_path / actor.name
+        with open(path / 'CURRENT') as f:
+            assert json.load(f)['generation'] > 0
+        q_values = Journal.load(str(path))
+        assert q_values.keys() == learned(actor).keys()
+        assert all(np.array_equal(q, learned(actor)[key]) for key, q in q_values.items())
+
+
+def test_compact_folds_the_log_into_the_base(tmp_path):
+    journal = Journal(str(tmp_path), buffer_size=2, compact_ratio=None)
+    keys = [((1, x), (), ((3, 3),)) for x in range(4)]
+    for key in keys:
+        journal.append_row(key, np.arange(5.0))
+    journal.append(keys[0], 1, 9.0)
+    journal.compact()
+    journal.append(keys[1], 4, -1.0)
+    journal.close()
+
+    assert sorted(os.listdir(tmp_path)) == ['CURRENT', 'base-1', 'log-1.bin']
+    q_values = Journal.load(str(tmp_path))
+    assert q_values[keys[0]].tolist() == [0.0, 9.0, 2.0, 3.0, 4.0]
+    assert q_values[keys[1]].tolist() == [0.0, 1.0, 2.0, 3.0, -1.0]
+    assert q_values[keys[3]].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_partial_record_is_dropped_on_open(tmp_path):
+    key = ((1, 1), (), ((3, 3),))
+    journal = Journal(str(tmp_path), buffer_size=1, compact_ratio=None)
+    journal.append_row(key, np.zeros(5))
+    journal.close()
+
+    log = tmp_path / 'log-0.bin'
+    size = os.path.getsize(log)
+    with open(log, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+
+    journal = Journal(str(tmp_path), buffer_size=1, compact_ratio=None)
+    assert journal.records == 5
+    assert os.path.getsize(log) == size
+    journal.append(key, 2, 4.0)
+    journal.close()
+    assert Journal.load(str(tmp_path))[key].tolist() == [0.0, 0.0, 4.0, 0.0, 0.0]
@@ -0,0 +1,106 @@
+import pickle
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from ctf.q_learning.qtable import QTable
+
+
+def random_keys(shape, n_allies, n_enemies, count, seed=0):
+    rng = random.Random(seed)
+    cells = [(y, x) for y in range(shape[0]) for x in range(shape[1])]
+    for _ in range(count):
+        yield (
+            rng.choice(cells),
+            tuple(sorted(rng.choice(cells) for _ in range(n_allies))),
+            tuple(sorted(rng.choice(cells) for _ in range(n_enemies)))
+        )
+
+
+@pytest.mark.parametrize('n_allies, n_enemies', [(0, 1), (1, 2), (2, 2)])
+def test_index_key_round_trip(n_allies, n_enemies):
+    table = QTable((10, 8), n_allies, n_enemies)
+    for key in random_keys(table.shape, n_allies, n_enemies, 500):
+        index = table.index(key)
+        assert table.key(index) == key
+
+        def cells(positions):
+            return np.array([[y * 8 + x for y, x in positions]], dtype=np.int64).reshape(1, -1)
+
+        assert table.indices(cells([key[0]])[0], cells(key[1]), cells(key[2]))[0] == index
+
+
+def test_rows_are_sparse():
+    """Only visited states take rows, on a board whose dense table would
+    not fit in memory."""
+    table = QTable((20, 20), 3, 4, capacity=4)
+    keys = list(dict.fromkeys(random_keys(table.shape, 3, 4, 100)))
+    for i, key in enumerate(keys):
+        table.setdefault(key, np.full(5, float(i)))
+
+    assert len(table) == len(keys)
+    assert len(table.values) < 4 * len(keys)
+    for i, key in enumerate(keys):
+        assert table[key][0] == i
+    assert table.get(((0, 0), ((0, 0),) * 3, ((0, 0),) * 4)) is None
+
+    copy = pickle.loads(pickle.dumps(table))
+    assert sorted(copy.keys()) == sorted(keys)
+    assert all(np.array_equal(copy[key], table[key]) for key in keys)
+
+
+def test_share_and_attach():
+    table = QTable((6, 5), 1, 1)
+    keys = list(dict.fromkeys(random_keys(table.shape, 1, 1, 200)))
+    for key in keys[:100]:
+        table[key] = np.ones(5)
+    table.share(capacity=len(keys))
+
+    other = QTable.attach(table.memory.name, table.shape, 1, 1, capacity=len(keys), lock=table.lock)
+    try:
+        assert all(key in other for key in keys[:100])
+        # Rows visited through one handle are found through the other.
+        for key in keys[100:]:
+            other.setdefault(key, np.full(5, 2.0))
+        other.update(keys[0], 3, 7.0)
+        assert len(table) == len(keys)
+        assert table[keys[-1]][0] == 2.0
+        assert table[keys[0]][3] == 7.0
+
+        # The block holds `capacity` rows.
+        new = next(key for key in random_keys(table.shape, 1, 1, 1000, seed=1) if key not in table)
+        with pytest.raises(RuntimeError):
+            table.setdefault(new, np.zeros(5))
+    finally:
+        other.close()
+        table.unshare()
+
+    assert table.memory is None
+    assert len(table) == len(keys)
+    assert table[keys[0]][3] == 7.0
+
+
+def test_update_takes_the_stripe_lock():
+    class CountingLock:
+        def __init__(self):
+            self.lock = threading.Lock()
+            self.acquired = 0
+
+        def __enter__(self):
+            self.lock.acquire()
+            self.acquired += 1
+
+        def __exit__(self, *exc_info):
+            self.lock.release()
+
+    table = QTable((6, 5), 0, 1)
+    key = ((1, 1), (), ((2, 2),))
+    table[key] = np.zeros(5)
+    table.locks = (CountingLock(), CountingLock())
+
+    assert table.update(key, 2, 1.5)[2] == 1.5
+    assert sum(lock.acquired for lock in table.locks) == 1
+    with pytest.raises(KeyError):
+        table.update(((1, 2), (), ((2, 2),)), 0, 1.0)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from ctf.q_learning.qtable import QTable
+from ctf.q_learning.vector_model import VectorModel
+from ctf.vector import VectorCtf
+
+
+@pytest.mark.parametrize('units', [(1, 1), (2, 2), (3, 2)])
+@pytest.mark.parametrize('shaping', [0.0, 0.1])
+def test_vector_ctf_matches_ctf(make_game, units, shaping):
+    """Every game of a `VectorCtf` follows the sequential rules of `Ctf`
+    under the same actions."""
+    rng = np.random.default_rng(0)
+    game = make_game(units, shaping=shaping)
+    vector = VectorCtf(game, 3)
+    actors = game.get_actors()
+    width = game.board.shape[1]
+
+    for _ in range(1000):
+        actions = rng.integers(5, size=len(actors))
+        for unit, (actor, action) in enumerate(zip(actors, actions)):
+            np.testing.assert_allclose(vector.cost(unit, np.full(3, action)), game.cost(actor, action))
+
+        game.apply_actions(list(zip(actors, actions)))
+        game.update_before()
+        vector.apply_actions(np.tile(actions, (3, 1)))
+        vector.update_before()
+
+        for k in range(3):
+            assert vector.positions[k].tolist() == [y * width + x for y, x in (actor.position for actor in actors)]
+            assert vector.jail_timers[k].tolist() == [actor.jail_timer for actor in actors]
+            assert vector.has_flag[k].tolist() == [actor.has_flag for actor in actors]
+            assert vector.grounded[k].tolist() == [flag.grounded for flag in game.flags]
+
+        game.update_after()
+        vector.update_after()
+        for k in range(3):
+            assert tuple(vector.score[k]) == game.score
+            assert tuple(vector.captures[k]) == game.captures
+
+
+def test_vector_ctf_copy(make_game):
+    vector = VectorCtf(make_game((2, 2)), 4)
+    copy = vector.copy()
+    copy.apply_actions(np.full((4, 4), 1))
+    assert not np.array_equal(copy.positions, vector.positions)
+
+    vector.copy(copy)
+    assert np.array_equal(copy.positions, vector.positions)
+
+
+def test_vector_model_first_update(make_game):
+    """On fresh tables, one step of `VectorModel` sets the q-value of the
+    action taken in every state to `alpha` times its `Ctf.cost`."""
+    game = make_game((2, 2))
+    for actor in game.get_actors():
+        actor.q_values = QTable(game.board.shape, len(game.units[actor.team]) - 1, len(game.units[1 - actor.team]))
+    VectorModel(VectorCtf(game, 1), alpha=0.5, seed=0).run()
+
+    for actor in game.get_actors():
+        q = actor.q_values[game.observation(actor)]
+        updated = np.flatnonzero(q)
+        assert len(updated) == 1
+        assert q[updated[0]] == pytest.approx(0.5 * game.cost(actor, updated[0]))